@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+# Benchmark a burst cycle (list, select, schedule and run) with a mock
+# Flux handle serving a synthetic workload, and stub plugins. For each
+# queue size and number of plugins we report the wall time, Flux RPCs,
+# peak memory and allocations of each phase, and can compare to a baseline.
+#
+# With fluxburst installed (or PYTHONPATH set to the repository):
+#
+#   python benchmarks/burst_cycle.py --output results.json
+#   python benchmarks/burst_cycle.py --sizes 10 1000 --baseline results.json
+
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+import fluxburst
+import fluxburst.defaults as defaults
+from fluxburst.client import FluxBurst
+from fluxburst.handles import FluxMock
+from fluxburst.logger import logger, setup_logger
+from fluxburst.plugins import BurstPlugin
+from fluxburst.workload import Workload
+
+# The Flux RPCs each call on the handle would issue (per job, for batches,
+# and per KVS transaction for jobspec updates)
+rpc_costs = {
+    "list_jobs": 1,
+    "get_job_info": 2,
+    "get_job_listing": 1,
+    "state": 1,
+    "update_jobspec": 1,
+    "update_jobspecs": 1,
+}
+
+
+@dataclass
+class StubParameters:
+    max_jobs: int = None
+
+
+class StubPlugin(BurstPlugin):
+    """
+    A plugin that accepts jobs up to max_jobs, and runs them instantly.
+    """
+
+    _param_dataclass = StubParameters
+
+    def schedule(self, job):
+        if self.params.max_jobs is not None and len(self.jobs) >= self.params.max_jobs:
+            return False
+        self.jobs[job["id"]] = job
+        return True
+
+    def run(self, *args, **kwargs):
+        self.jobs = {}
+
+
+class CountingMock(FluxMock):
+    """
+    A mock Flux handle that counts the RPCs a real handle would issue.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rpcs = 0
+
+    def list_jobs(self):
+        self.rpcs += rpc_costs["list_jobs"]
+        return super().list_jobs()
+
+    def get_job_infos(self, jobids, max_inflight=None):
+        jobids = list(jobids)
+        self.rpcs += rpc_costs["get_job_info"] * len(jobids)
+        return super().get_job_infos(jobids, max_inflight)
+
+    def get_job_listings(self, jobids, max_inflight=None):
+        jobids = list(jobids)
+        self.rpcs += rpc_costs["get_job_listing"] * len(jobids)
+        return super().get_job_listings(jobids, max_inflight)
+
+    def states(self, jobids, max_inflight=None):
+        jobids = list(jobids)
+        self.rpcs += rpc_costs["state"] * len(jobids)
+        return super().states(jobids, max_inflight)
+
+    def update_jobspec(self, job):
+        self.rpcs += rpc_costs["update_jobspec"]
+        return super().update_jobspec(job)
+
+    def update_jobspecs(self, jobs, chunk_size=None):
+        chunk_size = chunk_size or defaults.kvs_chunk_size
+        self.rpcs += rpc_costs["update_jobspecs"] * -(-len(jobs) // chunk_size)
+        return super().update_jobspecs(jobs, chunk_size)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description="fluxburst burst cycle benchmark")
+    parser.add_argument(
+        "--sizes",
+        help="number of jobs in the queue",
+        type=int,
+        nargs="+",
+        default=[10, 1000, 10000, 100000],
+    )
+    parser.add_argument(
+        "--plugins",
+        help="number of plugins to load",
+        type=int,
+        nargs="+",
+        default=[1, 4],
+    )
+    parser.add_argument(
+        "--repeat", help="timed runs (best is kept)", type=int, default=3
+    )
+    parser.add_argument("--seed", help="seed for the workload", type=int, default=42)
+    parser.add_argument(
+        "--burstable", help="fraction of burstable jobs", type=float, default=0.5
+    )
+    parser.add_argument("--output", help="write results to this json file")
+    parser.add_argument("--baseline", help="compare to results in this json file")
+    parser.add_argument(
+        "--threshold",
+        help="fail if a phase is this many times slower than the baseline",
+        type=float,
+        default=1.25,
+    )
+    parser.add_argument(
+        "--min-seconds",
+        dest="min_seconds",
+        help="only compare times of phases that take at least this long",
+        type=float,
+        default=0.01,
+    )
+    return parser
+
+
+def get_client(workload, plugins):
+    """
+    Get a client with a fresh mock handle and stub plugins.
+
+    The workload clock is stopped (speed 0) and the jobs are copied (bursts
+    change them) so every run sees the same queue. Plugins split the jobs,
+    so each one is asked to schedule some.
+    """
+    jobs = [
+        dict(job, transitions=list(job["transitions"]))
+        for job in workload.jobs.values()
+    ]
+    flux = CountingMock(workload=Workload(jobs), speed=0)
+    client = FluxBurst(handle=flux)
+    max_jobs = max(len(workload) // (2 * plugins), 1)
+    for i in range(plugins):
+        plugin = StubPlugin(StubParameters(max_jobs=max_jobs))
+        plugin.name = f"stub-{i}"
+        client.plugins[plugin.name] = plugin
+    return client
+
+
+def run_phases(client):
+    """
+    Run a burst cycle, yielding after each phase.
+    """
+    client.flux.list_jobs()
+    yield "list"
+
+    jobs = client.select_jobs()
+    yield "select"
+
+    # Schedule the jobs we selected, without selecting them again
+    client.select_jobs = lambda: jobs
+    client.process_queue()
+    yield "schedule"
+
+    client.run_plugins("run")
+    yield "run"
+
+
+def time_phases(client):
+    """
+    Get the seconds and RPCs for each phase.
+    """
+    results = {}
+    start = time.perf_counter()
+    rpcs = 0
+    for phase in run_phases(client):
+        now = time.perf_counter()
+        results[phase] = {"seconds": now - start, "rpcs": client.flux.rpcs - rpcs}
+        rpcs = client.flux.rpcs
+        start = time.perf_counter()
+    return results
+
+
+def trace_phases(client):
+    """
+    Get the peak memory (bytes) and allocations (blocks) for each phase.
+
+    Allocations are the net blocks still allocated after the phase.
+    """
+    results = {}
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for phase in run_phases(client):
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        blocks = sum(
+            stat.count_diff
+            for stat in after.compare_to(before, "filename")
+            if stat.count_diff > 0
+        )
+        results[phase] = {"peak_bytes": peak, "allocations": blocks}
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return results
+
+
+def benchmark(workload, plugins, repeat):
+    """
+    Benchmark the phases for a workload and number of plugins.
+
+    Times are the best of repeat runs, and memory is from one more run.
+    """
+    phases = {}
+    for _ in range(repeat):
+        client = get_client(workload, plugins)
+        gc.collect()
+        for phase, result in time_phases(client).items():
+            best = phases.get(phase)
+            if best is None or result["seconds"] < best["seconds"]:
+                phases[phase] = result
+
+    client = get_client(workload, plugins)
+    gc.collect()
+    for phase, result in trace_phases(client).items():
+        phases[phase].update(result)
+    return phases
+
+
+def compare(results, baseline, threshold, min_seconds=0):
+    """
+    Compare results to a baseline, returning regressions.
+
+    A phase regresses if it is slower than threshold times the baseline,
+    or issues more RPCs. Phases faster than min_seconds are too noisy to
+    compare times.
+    """
+    previous = {(r["jobs"], r["plugins"]): r["phases"] for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        key = (result["jobs"], result["plugins"])
+        if key not in previous:
+            continue
+        for phase, current in result["phases"].items():
+            before = previous[key].get(phase)
+            if before is None:
+                continue
+            ratio = current["seconds"] / max(before["seconds"], 1e-9)
+            if current["seconds"] >= min_seconds and ratio > threshold:
+                regressions.append(f"{key} {phase}: {ratio:.2f}x slower")
+            if current["rpcs"] > before["rpcs"]:
+                regressions.append(
+                    f"{key} {phase}: {current['rpcs']} RPCs (was {before['rpcs']})"
+                )
+    return regressions
+
+
+def main():
+    args = get_parser().parse_args()
+
+    # Job selection prints for each job, and we only want the results
+    setup_logger(quiet=True)
+    logger.set_level(logging.ERROR)
+
+    results = {
+        "fluxburst": fluxburst.__version__,
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "results": [],
+    }
+    print(
+        f"{'jobs':>8} {'plugins':>7} {'phase':>9} {'seconds':>10} {'rpcs':>8} "
+        f"{'peak MB':>8} {'allocs':>8}"
+    )
+    for size in args.sizes:
+        workload = Workload.generate(
+            count=size, seed=args.seed, burstable=args.burstable, pending=1.0
+        )
+        for plugins in args.plugins:
+            with open(os.devnull, "w") as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    phases = benchmark(workload, plugins, args.repeat)
+            results["results"].append(
+                {"jobs": size, "plugins": plugins, "phases": phases}
+            )
+            for phase, result in phases.items():
+                print(
+                    f"{size:>8} {plugins:>7} {phase:>9} {result['seconds']:>10.4f} "
+                    f"{result['rpcs']:>8} {result['peak_bytes'] / 1e6:>8.2f} "
+                    f"{result['allocations']:>8}"
+                )
+
+    if args.output:
+        with open(args.output, "w") as fd:
+            json.dump(results, fd, indent=4)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as fd:
+            baseline = json.load(fd)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions compared to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
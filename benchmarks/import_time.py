@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+# Check the cold start import time of fluxburst modules against a budget.
+# Each module is imported in a new interpreter with -X importtime, and the
+# best of a few runs is compared to the budget (in milliseconds). We also
+# check that heavy dependencies are not imported until they are used.
+#
+#   python benchmarks/import_time.py
+#   python benchmarks/import_time.py --budget 100 --repeat 5
+
+import argparse
+import subprocess
+import sys
+
+# Modules to check, and the budget for each (milliseconds)
+budgets = {
+    "fluxburst": 50,
+    "fluxburst.client": 150,
+    "fluxburst.kubernetes": 200,
+}
+
+# Dependencies that should only be imported when they are used
+deferred = ["kubernetes", "requests", "yaml", "fluxoperator", "importlib.metadata"]
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description="fluxburst import time budget")
+    parser.add_argument(
+        "--budget",
+        help="budget (ms) for all modules, instead of the defaults",
+        type=float,
+    )
+    parser.add_argument("--repeat", help="runs for each module", type=int, default=3)
+    parser.add_argument("modules", help="modules to check", nargs="*")
+    return parser
+
+
+def import_time(module):
+    """
+    Import a module in a new interpreter, returning the time (ms) and modules loaded.
+    """
+    code = f"import sys, {module}; print(' '.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines are "import time: self [us] | cumulative | imported package"
+    total = 0
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            total = int(parts[1]) / 1000
+    return total, set(result.stdout.split())
+
+
+def main():
+    args = get_parser().parse_args()
+    modules = args.modules or list(budgets)
+
+    failed = False
+    for module in modules:
+        budget = args.budget or budgets.get(module, 200)
+        times = []
+        for _ in range(args.repeat):
+            ms, loaded = import_time(module)
+            times.append(ms)
+        best = min(times)
+        imported = [name for name in deferred if name in loaded]
+
+        status = "ok"
+        if best > budget or imported:
+            status = "FAIL"
+            failed = True
+        print(f"{status:4} {module:24} {best:8.1f} ms (budget {budget:.0f} ms)")
+        if imported:
+            print(f"     {module} imports {', '.join(imported)} at import time")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+
+def get_count(job, key):
+    """
+    Get a count (e.g., nnodes or ncores) for a job, 0 if it is not known.
+
+    Pending jobs can have an empty string for counts not assigned yet.
+    """
+    value = job.get(key)
+    return value if isinstance(value, int) else 0
+
+
+def first_fit_decreasing(jobs, plugins):
+    """
+    Assign jobs to plugins, packing by the capacity that each declares.
+
+    Jobs are considered from the largest (by nodes, then cores) to the
+    smallest, and each is given to the first plugin with room left. Plugins
+    are tried cheapest first (by cost per node), and otherwise in order.
+    A plugin that does not declare a limit is assumed to have room.
+    Returns a lookup of job id to plugin name - a job without a plugin
+    that can fit it is left out.
+    """
+    capacities = {name: plugin.capacity() or {} for name, plugin in plugins}
+    remaining = {
+        name: capacity.get("max_nodes") for name, capacity in capacities.items()
+    }
+
+    # Python sort is stable, so plugins with the same cost keep their order
+    # and plugins that do not declare a cost go last
+    def cost(name):
+        value = capacities[name].get("cost_per_node")
+        return value is None, value or 0
+
+    names = sorted([name for name, _ in plugins], key=cost)
+
+    def size(item):
+        return get_count(item[1], "nnodes"), get_count(item[1], "ncores")
+
+    assigned = {}
+    for jobid, job in sorted(jobs.items(), key=size, reverse=True):
+        nodes, cores = size((jobid, job))
+        for name in names:
+            cores_per_node = capacities[name].get("cores_per_node")
+            if cores_per_node and cores > max(nodes, 1) * cores_per_node:
+                continue
+            if remaining[name] is not None and nodes > remaining[name]:
+                continue
+            if remaining[name] is not None:
+                remaining[name] -= nodes
+            assigned[jobid] = name
+            break
+    return assigned
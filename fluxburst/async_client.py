@@ -0,0 +1,186 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import time
+
+import fluxburst.defaults as defaults
+from fluxburst.client import FluxBurst
+from fluxburst.logger import logger
+
+
+class AsyncFluxBurst:
+    """
+    Flux Burst Client for asyncio
+
+    This wraps a FluxBurst client, and the same functions to load plugins,
+    set selectors, etc. are available. Selection, bursting and waiting are
+    coroutines, so one process can burst to several plugins at once and
+    keep watching the queue while clusters are created.
+    """
+
+    def __init__(self, client=None, **kwargs):
+        """
+        Create a new async burst client.
+
+        If a FluxBurst client is not provided, one is created with kwargs.
+        The Flux handle is not thread safe, so all calls that use it are
+        done in order on a single worker thread.
+        """
+        self.client = client or FluxBurst(**kwargs)
+        self._flux_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def __getattr__(self, name):
+        """
+        Anything we don't define (load, set_selector, plugins) goes to the client.
+        """
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    async def call_flux(self, func, *args, **kwargs):
+        """
+        Run a function that uses the Flux handle on the Flux worker thread.
+        """
+        # The thread gets a copy of the context, so spans have our parent
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._flux_executor,
+            functools.partial(contextvars.copy_context().run, func, *args, **kwargs),
+        )
+
+    async def call_plugin(self, plugin, name, *args, **kwargs):
+        """
+        Call a plugin function, preferring an async_<name> hook if it has one.
+
+        A plugin without the hook has the function run in a thread. As with
+        FluxBurst.call_plugin, the call is timed as plugin_<name>.
+        """
+        with self.client.metrics.timer(
+            f"plugin_{name}", plugin=plugin.name
+        ), self.client.tracer.span(f"plugin.{name}", plugin=plugin.name):
+            hook = getattr(plugin, f"async_{name}", None)
+            if hook is not None:
+                return await hook(*args, **kwargs)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None,
+                functools.partial(
+                    contextvars.copy_context().run,
+                    getattr(plugin, name),
+                    *args,
+                    **kwargs,
+                ),
+            )
+
+    async def select_jobs(self):
+        """
+        Use filters to select jobs.
+        """
+        return await self.call_flux(self.client.select_jobs)
+
+    async def process_queue(self):
+        """
+        Process queue is the entrypoint to run one burst cycle.
+        """
+        return await self.call_flux(self.client.process_queue)
+
+    async def run_burst(self, request_burst=False, nodes=None, tasks=None):
+        """
+        Select and schedule jobs, and then run all plugins at once.
+        """
+        with self.client.tracer.span("burst"):
+            unmatched, has_jobs = await self.process_queue()
+
+            # Run the bursts, unless there are no jobs (or held jobs)
+            if has_jobs or self.client.has_pending():
+                await self.run_plugins(
+                    "run", request_burst=request_burst, nodes=nodes, tasks=tasks
+                )
+        self.client.flush()
+        return unmatched
+
+    async def run_unburst(self):
+        """
+        Run unburst for all plugins that have it at once.
+        """
+        with self.client.tracer.span("unburst"):
+            results = await self.run_plugins("unburst")
+        self.client.flush()
+        return results
+
+    async def run_plugins(self, name, **kwargs):
+        """
+        Run a function (e.g., run or unburst) for all plugins that have it at once.
+
+        As with FluxBurst.run_plugins and the thread executor, an error in
+        one plugin does not stop the others. The result (or exception) for
+        each plugin is returned and kept in client.results, by plugin name.
+        """
+        plugins = [
+            (pname, p) for pname, p in self.client.iter_plugins() if hasattr(p, name)
+        ]
+        results = await asyncio.gather(
+            *[self.call_plugin(plugin, name, **kwargs) for _, plugin in plugins],
+            return_exceptions=True,
+        )
+        self.client.results = {}
+        for (pname, _), result in zip(plugins, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Plugin {pname} had an issue with {name}: {result}")
+            self.client.results[pname] = result
+        return self.client.results
+
+    async def request_burst(self, name, nodes, tasks):
+        """
+        Request burst is a direct handle to get a plugin and request a burst.
+        """
+        plugin = self.client.plugins.get(name)
+        if not plugin:
+            logger.warning(f"Plugin {name} is not known.")
+            return
+        return await self.call_plugin(
+            plugin, "run", request_burst=True, nodes=nodes, tasks=tasks
+        )
+
+    async def wait_for_jobs(
+        self, jobids=None, states=None, timeout=None, interval=None
+    ):
+        """
+        Wait for jobs to reach one or more states, without blocking the loop.
+
+        See FluxBurst.wait_for_jobs for the returned times in each state.
+        """
+        jobids = jobids or await self.call_flux(self.client.list_jobs)
+        jobids = list(set(jobids))
+        states = states or ["INACTIVE"]
+        interval = defaults.wait_interval if interval is None else interval
+        start = time.time()
+
+        times = {jobid: {} for jobid in jobids}
+        current = {}
+        while jobids:
+            found = await self.call_flux(
+                self.client.flux.states, jobids, max_inflight=self.client.max_inflight
+            )
+            jobids = self.client.update_state_times(found, states, current, times)
+            if not jobids:
+                break
+
+            wait = self.client.get_wait(start, interval, timeout)
+            if wait <= 0:
+                logger.warning(f"Timeout waiting for {len(jobids)} jobs.")
+                break
+            await asyncio.sleep(wait)
+        return self.client.finish_state_times(states, current, times)
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return "[flux-burst-async-client]"
@@ -0,0 +1,129 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import argparse
+import os
+import sys
+
+import fluxburst
+from fluxburst.logger import setup_logger
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description="Flux Burst",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+
+    # Global Variables
+    parser.add_argument(
+        "--debug",
+        dest="debug",
+        help="use verbose logging to debug.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--quiet",
+        dest="quiet",
+        help="suppress additional output.",
+        default=False,
+        action="store_true",
+    )
+    parser.add_argument(
+        "--version",
+        dest="version",
+        help="show software version.",
+        default=False,
+        action="store_true",
+    )
+
+    subparsers = parser.add_subparsers(
+        help="actions",
+        title="actions",
+        description="actions",
+        dest="command",
+    )
+    subparsers.add_parser("version", description="show software version")
+
+    serve = subparsers.add_parser(
+        "serve",
+        formatter_class=argparse.RawTextHelpFormatter,
+        description="run burst cycles until stopped, and then unburst",
+    )
+    serve.add_argument("config", help="yaml config with plugins to load")
+    serve.add_argument(
+        "--interval",
+        help="seconds between burst cycles (defaults to config or 30)",
+        type=float,
+    )
+    serve.add_argument(
+        "--events",
+        help="also run a cycle when there are new events in the queue",
+        default=None,
+        action="store_true",
+    )
+    serve.add_argument(
+        "--max-cycles",
+        dest="max_cycles",
+        help="stop after this many cycles",
+        type=int,
+    )
+    serve.add_argument(
+        "--executor",
+        help="run plugins one at a time (default) or in threads",
+        choices=["thread"],
+    )
+    serve.add_argument(
+        "--mock",
+        help="use a mock Flux handle (for testing)",
+        default=False,
+        action="store_true",
+    )
+    return parser
+
+
+def run():
+    """
+    Entrypoint to flux-burst
+    """
+    parser = get_parser()
+
+    def help(return_code=0):
+        version = fluxburst.__version__
+
+        print("\nFlux Burst Client v%s" % version)
+        parser.print_help()
+        sys.exit(return_code)
+
+    # If the user didn't provide any arguments, show the full help
+    if len(sys.argv) == 1:
+        help()
+
+    # If an error occurs while parsing the arguments, the interpreter will exit with value 2
+    args, extra = parser.parse_known_args()
+
+    if args.debug is True:
+        os.environ["MESSAGELEVEL"] = "DEBUG"
+
+    # Show the version and exit
+    if args.command == "version" or args.version:
+        print(fluxburst.__version__)
+        sys.exit(0)
+
+    setup_logger(quiet=args.quiet, debug=args.debug)
+
+    # Here we can assume instantiated to get args
+    if args.command == "serve":
+        from .serve import main
+    else:
+        help(1)
+
+    # Pass on to the correct parser
+    main(args=args, parser=parser, extra=extra)
+
+
+if __name__ == "__main__":
+    run()
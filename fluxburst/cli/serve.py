@@ -0,0 +1,49 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import fluxburst.utils as utils
+from fluxburst.client import FluxBurst
+from fluxburst.daemon import BurstDaemon, load_config
+from fluxburst.metrics import PrometheusSink
+from fluxburst.tracing import get_tracer
+
+
+def main(args, parser, extra, subparser=None):
+    """
+    Load plugins from the config, and run burst cycles until stopped.
+
+    Command line arguments take precedence over the same in the config.
+    """
+    utils.ensure_no_extra(extra)
+    config = utils.read_yaml(args.config) or {}
+
+    def get(key, default=None):
+        value = getattr(args, key)
+        return config.get(key, default) if value is None else value
+
+    client = FluxBurst(
+        mock=args.mock or config.get("mock", False),
+        executor=get("executor"),
+        max_workers=config.get("max_workers"),
+        max_inflight=config.get("max_inflight"),
+    )
+    # Timers and counters can be written for the Prometheus node exporter
+    if config.get("metrics"):
+        client.set_metrics(PrometheusSink(config["metrics"]))
+
+    # Spans go to a Chrome trace file, or an OTLP endpoint (http)
+    if config.get("tracing"):
+        client.set_tracer(get_tracer(config["tracing"]))
+    load_config(client, config)
+    if not client.plugins:
+        parser.exit(1, "No plugins were loaded, see the plugins in your config.\n")
+
+    daemon = BurstDaemon(
+        client,
+        interval=get("interval"),
+        events=get("events", False),
+        max_cycles=get("max_cycles"),
+    )
+    daemon.run()
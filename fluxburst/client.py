@@ -4,17 +4,36 @@
 # SPDX-License-Identifier: (MIT)
 
 import collections
+import concurrent.futures
+import contextvars
 import time
 
+import fluxburst.defaults as defaults
 import fluxburst.handles as handles
+import fluxburst.metrics as metrics
 import fluxburst.selectors as selectors
 import fluxburst.sorting as sorting
-from fluxburst.logger import setup_logger
+import fluxburst.tracing as tracing
+import fluxburst.tracker as tracker
+from fluxburst.job import BurstJob
+from fluxburst.logger import logger, setup_logger
 
 from .plugins import burstable_plugins
 
-setup_logger(quiet=False, debug=True)
-from fluxburst.logger import logger  # noqa
+# Ways plugins can be run (None is one at a time, in order)
+executors = [None, "thread"]
+
+
+def get_handle(handle=None, mock=False):
+    """
+    Get the handle wrapper for the client.
+
+    A handle that already has list_jobs (e.g., a FluxMock with a workload)
+    is used as is, otherwise we wrap a Flux handle (or make a mock).
+    """
+    if hasattr(handle, "list_jobs"):
+        return handle
+    return handles.FluxMock(handle) if mock else handles.FluxHandle(handle)
 
 
 class FluxBurst:
@@ -22,7 +41,15 @@ class FluxBurst:
     Flux Burst Client
     """
 
-    def __init__(self, handle=None, mock=False, validate=True):
+    def __init__(
+        self,
+        handle=None,
+        mock=False,
+        validate=True,
+        max_inflight=None,
+        executor=None,
+        max_workers=None,
+    ):
         """
         Create a new burst client.
 
@@ -32,13 +59,37 @@ class FluxBurst:
         burstable. For more complex cases, it can perform it's own logic and
         flag some subset as burstable instead. Validation is always done for
         the top level module, howevert the validate boolean here determines
-        if the plugin should run its own validation function.
+        if the plugin should run its own validation function. The max_inflight
+        argument controls how many Flux RPCs can be outstanding when job info
+        is retrieved for the queue. If executor is "thread", plugin run and
+        unburst are done at the same time with up to max_workers threads.
         """
+        # Log to the console, unless the logger was already set up
+        if logger.stream_handler is None:
+            setup_logger(quiet=False, debug=True)
+
+        if executor not in executors:
+            raise ValueError(
+                f"Executor {executor} is not known, choices are {executors}"
+            )
         self.reset_selector()
         self.reset_plugins()
-        self.flux = handles.FluxMock(handle) if mock else handles.FluxHandle(handle)
+        self.flux = get_handle(handle, mock)
         self.set_ordering(sorting.in_order)
+        self.reset_assignment()
         self.validate = validate
+        self.max_inflight = max_inflight or defaults.max_inflight_rpcs
+        self.tracker = None
+        self.executor = executor
+        self.reset_metrics()
+        self.reset_tracer()
+        self.max_workers = max_workers
+
+        # Results (or exceptions) from the last run of plugins, by name
+        self.results = {}
+
+        # Jobs marked as scheduled, to write to the KVS (see update_jobspecs)
+        self.updates = []
 
     @property
     def choices(self):
@@ -53,7 +104,9 @@ class FluxBurst:
         specific to the plugin.
         """
         if name not in burstable_plugins:
-            raise ValueError(f"Plugin {name} is not known. Choices are {self.choices}")
+            raise ValueError(
+                f"Plugin {name} is not known. Choices are {'|'.join(burstable_plugins)}"
+            )
 
         # Validate the plugin, first plugin module then loaded class
         self.validate_module(name)
@@ -61,6 +114,9 @@ class FluxBurst:
 
         # We set the name attribute so it's always matched to the module
         plugin.name = name
+        plugin.flux = self.flux
+        plugin.metrics = self.metrics
+        plugin.tracer = self.tracer
         self.check_plugin_integrity(plugin)
 
         # If the plugin does it's own validation, do here
@@ -107,11 +163,62 @@ class FluxBurst:
         """
         self._job_selector = func
 
+    def set_prefilter(self, func):
+        """
+        Register a cheap job filter for select_jobs.
+
+        The prefilter is given the job from the listing (without the jobspec)
+        and only jobs that pass have their jobspec retrieved for the selector.
+        """
+        self._job_prefilter = func
+
+    def set_metrics(self, sink):
+        """
+        Set a sink for timers and counters (see fluxburst.metrics).
+
+        The sink is shared with the Flux handle and plugins, and flushed
+        at the end of each burst.
+        """
+        self.metrics = sink
+        self.flux.metrics = sink
+        for plugin in self.plugins.values():
+            plugin.metrics = sink
+
+    def reset_metrics(self):
+        self.set_metrics(metrics.null)
+
+    def set_tracer(self, tracer):
+        """
+        Set a tracer for spans of each burst cycle (see fluxburst.tracing).
+
+        The tracer is shared with the Flux handle and plugins, and flushed
+        at the end of each burst.
+        """
+        self.tracer = tracer
+        self.flux.tracer = tracer
+        for plugin in self.plugins.values():
+            plugin.tracer = tracer
+
+    def reset_tracer(self):
+        self.set_tracer(tracing.null)
+
     def reset_plugins(self):
         self.plugins = collections.OrderedDict()
 
     def reset_selector(self):
         self._job_selector = selectors.is_burstable
+        self._job_prefilter = selectors.is_pending
+
+    def track_queue(self):
+        """
+        Track the queue incrementally instead of listing it every cycle.
+
+        We subscribe to the job-manager journal and keep an index of pending
+        jobs, so a cycle only needs to look up jobs that are new.
+        """
+        self.flux.watch_journal()
+        self.tracker = tracker.QueueTracker(self.flux, max_inflight=self.max_inflight)
+        return self.tracker
 
     def list_jobs(self):
         """
@@ -120,24 +227,79 @@ class FluxBurst:
         listing = self.flux.list_jobs()
         return [job["id"] for job in listing.get("jobs", [])]
 
-    def wait_for_jobs(self, jobids=None, states=None):
+    def wait_for_jobs(self, jobids=None, states=None, timeout=None, interval=None):
         """
         Wait for jobs to reach one or more states.
+
+        The states of all jobs still being waited on are checked together
+        every interval seconds, and we return as soon as the last job
+        reaches a target state (or the timeout in seconds is reached).
+        We return the time (in seconds) each job was seen in each state
+        before it reached a target state.
         """
         jobids = list(set(jobids or self.list_jobs()))
         logger.debug(f"Waiting for {len(jobids)} to be done")
 
         # Assume we allow jobs to complete or fail
         states = states or ["INACTIVE"]
+        interval = defaults.wait_interval if interval is None else interval
+        start = time.time()
+
+        # Time spent in each state, and the current state and when we saw it
+        times = {jobid: {} for jobid in jobids}
+        current = {}
 
         while jobids:
-            jobid = jobids.pop(0)
-            state = self.flux.state(jobid)
-            logger.debug(f"Job {jobid} is in state {state}")
-            if state not in states:
-                jobids.append(jobid)
-            time.sleep(5)
+            found = self.flux.states(jobids, max_inflight=self.max_inflight)
+            jobids = self.update_state_times(found, states, current, times)
+            if not jobids:
+                break
+
+            # Don't sleep past the timeout, but check one last time at it
+            wait = self.get_wait(start, interval, timeout)
+            if wait <= 0:
+                logger.warning(f"Timeout waiting for {len(jobids)} jobs.")
+                break
+            time.sleep(wait)
+        return self.finish_state_times(states, current, times)
+
+    def update_state_times(self, found, states, current, times):
+        """
+        Given found states for jobs, add to the time spent in each state.
+
+        Current holds the last state seen for each job, and when. We return
+        the job ids that have not reached one of the target states.
+        """
+        now = time.time()
+        for jobid, state in found.items():
+            last, since = current.get(jobid, (None, now))
+            if last is not None:
+                times[jobid][last] = times[jobid].get(last, 0) + (now - since)
+            if state != last:
+                logger.debug(f"Job {jobid} is in state {state}")
+            current[jobid] = (state, now)
+
+        jobids = [jobid for jobid in found if current[jobid][0] not in states]
+        if jobids:
             logger.debug(f"Waiting for {len(jobids)} to be done")
+        return jobids
+
+    def finish_state_times(self, states, current, times):
+        """
+        Jobs that reached a target state do not count time in it.
+        """
+        for jobid, (state, _) in current.items():
+            if state in states:
+                times[jobid].pop(state, None)
+        return times
+
+    def get_wait(self, start, interval, timeout=None):
+        """
+        Get seconds to wait before checking again, not going past the timeout.
+        """
+        if timeout is None:
+            return interval
+        return min(interval, timeout - (time.time() - start))
 
     def run_unburst(self):
         """
@@ -145,10 +307,17 @@ class FluxBurst:
         """
         # When we get here, undo the bursts
         # It assumes all jobs are done
-        for _, plugin in self.iter_plugins():
-            if not hasattr(plugin, "unburst"):
-                continue
-            plugin.unburst()
+        with self.tracer.span("unburst"):
+            results = self.run_plugins("unburst")
+        self.flush()
+        return results
+
+    def flush(self):
+        """
+        Flush metrics and spans at the end of a cycle.
+        """
+        self.metrics.flush()
+        self.tracer.flush()
 
     def run_burst(self, request_burst=False, nodes=None, tasks=None):
         """
@@ -161,18 +330,89 @@ class FluxBurst:
         If request_burst with nodes and tasks are required, each plugin
         will simply request creation for the size/tasks needed.
         """
-        # TODO what to do with unmatched jobs?
-        unmatched, has_jobs = self.process_queue()
-
-        # Cut out early if no jobs
-        if not has_jobs:
-            return unmatched
+        # One span for the cycle, with the Flux calls and plugins in it
+        with self.tracer.span("burst"):
+            # TODO what to do with unmatched jobs?
+            unmatched, has_jobs = self.process_queue()
 
-        # When we get here, run the bursts
-        for _, plugin in self.iter_plugins():
-            plugin.run(request_burst=request_burst, nodes=nodes, tasks=tasks)
+            # When we get here, run the bursts (unless there are no jobs, and
+            # no plugin is holding jobs from an earlier cycle)
+            if has_jobs or self.has_pending():
+                self.run_plugins(
+                    "run", request_burst=request_burst, nodes=nodes, tasks=tasks
+                )
+        self.flush()
         return unmatched
 
+    def run_plugins(self, name, **kwargs):
+        """
+        Run a function (e.g., run or unburst) for each plugin that has it.
+
+        Without an executor, plugins are run in order and an error stops the
+        run. With the thread executor, plugins are run at the same time and
+        an error in one plugin does not stop the others. Either way, the
+        result (or exception) for each plugin is returned and kept in
+        self.results, by plugin name.
+        """
+        plugins = [(pname, p) for pname, p in self.iter_plugins() if hasattr(p, name)]
+        self.results = {}
+        if not self.executor or not plugins:
+            for pname, plugin in plugins:
+                self.results[pname] = self.call_plugin(pname, plugin, name, **kwargs)
+            return self.results
+
+        # Each thread gets a copy of the context, so spans have our parent
+        max_workers = self.max_workers or len(plugins)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pname: pool.submit(
+                    contextvars.copy_context().run,
+                    self.call_plugin,
+                    pname,
+                    plugin,
+                    name,
+                    **kwargs,
+                )
+                for pname, plugin in plugins
+            }
+        for pname, future in futures.items():
+            try:
+                self.results[pname] = future.result()
+            except Exception as e:
+                logger.warning(f"Plugin {pname} had an issue with {name}: {e}")
+                self.results[pname] = e
+        return self.results
+
+    def has_pending(self):
+        """
+        Determine if any plugin holds jobs it has not run yet.
+        """
+        return any(
+            plugin.has_pending()
+            for plugin in self.plugins.values()
+            if hasattr(plugin, "has_pending")
+        )
+
+    def call_plugin(self, pname, plugin, name, **kwargs):
+        """
+        Call a plugin function, timed as plugin_<name> for the plugin.
+        """
+        with self.metrics.timer(f"plugin_{name}", plugin=pname), self.tracer.span(
+            f"plugin.{name}", plugin=pname
+        ):
+            return getattr(plugin, name)(**kwargs)
+
+    def schedule_job(self, plugin, job):
+        """
+        Ask a plugin to schedule a job, returning if it was accepted.
+        """
+        with self.tracer.span(
+            "plugin.schedule", plugin=plugin.name, jobid=job["id"]
+        ) as span:
+            accepted = plugin.schedule(job)
+            span.set_attribute("accepted", bool(accepted))
+        return accepted
+
     def request_burst(self, name, nodes, tasks):
         """
         Request burst is a direct handle to get a plugin and request a burst.
@@ -186,6 +426,19 @@ class FluxBurst:
             return
         return plugin.run(request_burst=True, nodes=nodes, tasks=tasks)
 
+    def set_assignment(self, func):
+        """
+        Set a function to assign the batch of selected jobs to plugins.
+
+        The function is given the selected jobs (by id) and a list of
+        (name, plugin) and returns a lookup of job id to plugin name.
+        See fluxburst.assign.first_fit_decreasing for an example.
+        """
+        self._assign_func = func
+
+    def reset_assignment(self):
+        self._assign_func = None
+
     def set_ordering(self, func):
         """
         Set a custom function that knows how to yield names, plugins.
@@ -212,17 +465,39 @@ class FluxBurst:
         """
         # Run filters across queue to select jobs
         # This is a dict, keys with job id, values jobinfo
-        jobs = self.select_jobs()
+        with self.metrics.timer("select"), self.tracer.span("select") as span:
+            jobs = self.select_jobs()
+            span.set_attribute("jobs", len(jobs))
+        self.metrics.count("jobs_selected", len(jobs))
         if not jobs:
             return [], False
 
+        # Jobs that were scheduled are written to the KVS together, at the end
+        try:
+            with self.metrics.timer("schedule"), self.tracer.span("schedule") as span:
+                unmatched = self.schedule_jobs(jobs)
+                span.set_attribute("unmatched", len(unmatched))
+        finally:
+            self.update_jobspecs()
+        self.metrics.count("jobs_scheduled", len(jobs) - len(unmatched))
+        self.metrics.count("jobs_unmatched", len(unmatched))
+        return unmatched, True
+
+    def schedule_jobs(self, jobs):
+        """
+        Give selected jobs to plugins, returning those that are unmatched.
+        """
+        # An assignment function decides for the whole batch at once
+        if self._assign_func is not None:
+            return self.assign_jobs(jobs)
+
         # Going through plugins, determine if matches and can run
         unmatched = []
         for _, job in jobs.items():
             scheduled = False
             for _, plugin in self.iter_plugins():
                 # Give to first burstable plugin that can accept
-                if plugin.schedule(job):
+                if self.schedule_job(plugin, job):
                     # Remove the burstable attribute so it isn't assigned to another
                     # This is more for development - we could likely use a better way
                     self.mark_as_scheduled(job, plugin.name)
@@ -235,7 +510,27 @@ class FluxBurst:
 
         if unmatched:
             logger.warning(f"There are {len(unmatched)} jobs that cannot be bursted.")
-        return unmatched, True
+        return unmatched
+
+    def assign_jobs(self, jobs):
+        """
+        Use the assignment function to give each job to a plugin.
+
+        The plugin still needs to accept the job (schedule) and jobs that are
+        not assigned or accepted are returned as unmatched.
+        """
+        assigned = self._assign_func(jobs, list(self.iter_plugins()))
+        unmatched = []
+        for jobid, job in jobs.items():
+            plugin = self.plugins.get(assigned.get(jobid))
+            if plugin is not None and self.schedule_job(plugin, job):
+                self.mark_as_scheduled(job, plugin.name)
+            else:
+                unmatched.append(job)
+
+        if unmatched:
+            logger.warning(f"There are {len(unmatched)} jobs that cannot be bursted.")
+        return unmatched
 
     def mark_as_scheduled(self, job, plugin_name):
         """
@@ -245,6 +540,10 @@ class FluxBurst:
         that it's been scheduled. We also add the plugin it was scheduled
         with, in case we somehow need to regenerate/remember a burst.
         """
+        with self.metrics.timer("mark_as_scheduled"):
+            self._mark_as_scheduled(job, plugin_name)
+
+    def _mark_as_scheduled(self, job, plugin_name):
         # Add an attribute that says "this job is assigned to burstable plugin X"
         job["spec"]["attributes"]["system"]["burst-scheduled"] = plugin_name
 
@@ -252,9 +551,44 @@ class FluxBurst:
         if "burstable" in job["spec"]["attributes"]["system"]:
             del job["spec"]["attributes"]["system"]["burstable"]
 
-        # Update the KVS (is this possible)?
-        # This doesn't currently work, so not doing anything :)
-        self.flux.update_jobspec(job)
+        # An incremental queue should not select the job again
+        if self.tracker is not None:
+            self.tracker.mark_as_scheduled(job["id"])
+
+        # The KVS is updated for all jobs at once (see update_jobspecs)
+        self.updates.append(job)
+
+    def update_jobspecs(self):
+        """
+        Write the jobspecs of jobs marked as scheduled to the KVS.
+
+        This is done at the end of process_queue, so all jobs scheduled in
+        a cycle are written in one transaction (or a few, for many jobs)
+        instead of one for each job. Jobs that were written drop their
+        jobspec, since plugins only need the compact fields, and look it up
+        again if it is asked for. We return job ids that could not be updated.
+        """
+        jobs, self.updates = self.updates, []
+        if not jobs:
+            return []
+        with self.metrics.timer("update_jobspecs"), self.tracer.span(
+            "update_jobspecs", jobs=len(jobs)
+        ):
+            failed = self.flux.update_jobspecs(jobs)
+        if failed:
+            logger.warning(f"Could not update the jobspec of {len(failed)} jobs.")
+        skip = set(failed)
+        loader = self.load_jobspec
+        for job in jobs:
+            if isinstance(job, BurstJob) and job["id"] not in skip:
+                job.unload(loader)
+        return failed
+
+    def load_jobspec(self, jobid):
+        """
+        Look up the jobspec of a job, e.g., for a job record that dropped it.
+        """
+        return self.flux.get_job_info(jobid)["spec"]
 
     def select_jobs(self):
         """
@@ -263,22 +597,53 @@ class FluxBurst:
         This step is agnostic to the burstable plugins - it is simply
         deducing (via our selector function) what jobs are contenders
         for bursting. See the README / documentation for example info.
+        Selection is done in two stages: the prefilter sees only the job
+        listing, and the selector sees the full job info and jobspec of
+        those that pass. Selected jobs are kept as a compact BurstJob.
         """
+        if self.tracker is not None:
+            return self.select_tracked_jobs()
+
         # Keep track of selected burstable jobs by id
-        listing = self.flux.list_jobs()
+        with self.metrics.timer("list_jobs"):
+            listing = self.flux.list_jobs()
+        self.metrics.count("jobs_seen", len(listing.get("jobs", [])))
         selected = {}
 
-        for job in listing.get("jobs", []):
-            info = self.flux.get_job_info(job["id"])
+        # Job info (and the jobspec) is retrieved in bulk, only for prefiltered
+        jobids = [
+            job["id"] for job in listing.get("jobs", []) if self._job_prefilter(job)
+        ]
+        with self.metrics.timer("job_info"):
+            infos = self.flux.get_job_infos(jobids, max_inflight=self.max_inflight)
+
+        for jobid, info in infos.items():
             if not self._job_selector(info):
                 continue
-            print(f"🧋️  Job {job['id']} is marked for bursting.")
-            selected[job["id"]] = info
+            print(f"🧋️  Job {jobid} is marked for bursting.")
+            selected[jobid] = BurstJob.from_info(info)
 
         # We don't give a warning here, because likely there aren't
         # jobs that are burstable (it's a more rare event)
         return selected
 
+    def select_tracked_jobs(self):
+        """
+        Select jobs from the incremental queue, applying new events first.
+        """
+        with self.metrics.timer("journal"):
+            self.tracker.update()
+        with self.metrics.timer("list_jobs"):
+            self.tracker.resolve()
+        self.metrics.count("jobs_seen", len(self.tracker.jobs))
+
+        # Job info (and the jobspec) is retrieved for new jobs that pass the prefilter
+        with self.metrics.timer("job_info"):
+            selected = self.tracker.select(self._job_prefilter, self._job_selector)
+        for jobid in selected:
+            print(f"🧋️  Job {jobid} is marked for bursting.")
+        return selected
+
     def __repr__(self):
         return str(self)
 
@@ -0,0 +1,175 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import importlib
+import signal
+import threading
+import time
+
+import fluxburst.defaults as defaults
+import fluxburst.utils as utils
+from fluxburst.logger import logger
+from fluxburst.plugins import burstable_plugins
+
+
+class BurstDaemon:
+    """
+    Run burst cycles with one client until stopped.
+
+    The client (and the Flux handle, plugins, kubernetes clients and caches
+    that it holds) is kept across cycles. A cycle is run every interval
+    seconds, and if events is True, the queue is tracked and a cycle is also
+    run as soon as journal events arrive. When stopped (or on SIGINT or
+    SIGTERM) we finish the current cycle and run unburst for the plugins.
+    """
+
+    def __init__(self, client, interval=None, events=False, max_cycles=None):
+        self.client = client
+        self.interval = float(defaults.serve_interval if interval is None else interval)
+        self.events = events
+        self.max_cycles = max_cycles
+        self.cycles = 0
+        self._stopped = threading.Event()
+        if self.events and self.client.tracker is None:
+            self.client.track_queue()
+
+    def stop(self, *args):
+        """
+        Ask the daemon to stop after the current cycle.
+        """
+        logger.info("Stopping flux-burst after the current cycle.")
+        self._stopped.set()
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def run(self):
+        """
+        Run cycles until stopped, and then unburst.
+        """
+        handlers = self.set_signal_handlers()
+        try:
+            while not self.stopped:
+                self.cycle()
+                if self.max_cycles is not None and self.cycles >= self.max_cycles:
+                    break
+                self.wait()
+        finally:
+            self.reset_signal_handlers(handlers)
+            logger.info(f"Running unburst after {self.cycles} cycles.")
+            self.client.run_unburst()
+
+    def cycle(self):
+        """
+        Run one burst cycle, returning unmatched jobs.
+
+        An error in a cycle is logged, and does not stop the daemon.
+        """
+        self.cycles += 1
+        start = time.time()
+        try:
+            unmatched = self.client.run_burst()
+        except Exception as e:
+            logger.error(f"Issue with burst cycle {self.cycles}: {e}")
+            return
+        logger.debug(f"Burst cycle {self.cycles} took {time.time() - start:.2f}s")
+        return unmatched
+
+    def wait(self):
+        """
+        Wait for the next cycle: the interval, or queue events if we track them.
+        """
+        if not self.events:
+            self._stopped.wait(self.interval)
+            return
+
+        # The tracker applies the events, so the next cycle doesn't need to.
+        # Each update returns within a second, to notice if we are stopped.
+        # A handle without a journal to wait on (e.g., the mock) returns
+        # right away, so we wait for the rest of the step
+        end = time.time() + self.interval
+        while not self.stopped:
+            now = time.time()
+            if now >= end:
+                return
+            deadline = min(end, now + 1.0)
+            if self.client.tracker.update(timeout=deadline - now, deadline=deadline):
+                return
+            self._stopped.wait(max(0, deadline - time.time()))
+
+    def set_signal_handlers(self):
+        """
+        Stop on SIGINT and SIGTERM, returning the previous handlers.
+
+        Signal handlers can only be set from the main thread.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+        handlers = {}
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            handlers[signum] = signal.signal(signum, self.stop)
+        return handlers
+
+    def reset_signal_handlers(self, handlers):
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return "[flux-burst-daemon]"
+
+
+def load_config(client, config):
+    """
+    Load plugins into the client from a config (a dict, or yaml file).
+
+    Each plugin has params for its dataclass, which by convention is
+    BurstParameters in the plugin module, or is given as module.Class
+    with "dataclass". For example:
+
+    plugins:
+      gke:
+        params:
+          project: my-project
+          name: burst-0
+    """
+    if isinstance(config, str):
+        config = utils.read_yaml(config)
+    for name, spec in (config.get("plugins") or {}).items():
+        spec = spec or {}
+        dataclass = get_dataclass(name, spec.get("dataclass"))
+        client.load(name, dataclass(**(spec.get("params") or {})))
+    return config
+
+
+def get_dataclass(name, path=None):
+    """
+    Get the dataclass for the parameters of a plugin.
+
+    Without a path (module.Class), we look for BurstParameters in the plugin
+    module (found as the client finds it, by entry point or name), and then
+    the plugin.py module of it.
+    """
+    if path:
+        module, classname = path.rsplit(".", 1)
+        return getattr(importlib.import_module(module), classname)
+
+    if name in burstable_plugins:
+        module = burstable_plugins[name]
+        if hasattr(module, "BurstParameters"):
+            return module.BurstParameters
+        module = module.__name__
+    else:
+        module = f"{defaults.plugin_prefix}{name}"
+    try:
+        return getattr(importlib.import_module(f"{module}.plugin"), "BurstParameters")
+    except (ImportError, AttributeError):
+        pass
+    raise ValueError(
+        f"Cannot find BurstParameters for plugin {name}, please set the dataclass."
+    )
@@ -14,11 +14,60 @@ reps = {"$install_dir": install_dir, "$root_dir": os.path.dirname(install_dir)}
 # Default flux operator yaml for kubernetes
 flux_operator_yaml = "https://raw.githubusercontent.com/flux-framework/flux-operator/main/examples/dist/flux-operator.yaml"
 
-# Default plugin prefix
+# The MiniCluster custom resource
+minicluster_group = "flux-framework.org"
+minicluster_version = "v1alpha1"
+minicluster_plural = "miniclusters"
+
+# Seconds a cached flux operator yaml is used before checking for a new one
+flux_operator_ttl = 86400
+
+# Connection pool size for kubernetes API clients shared across bursts
+kubernetes_pool_maxsize = 32
+
+# MiniClusters to create at once (in total, and in one namespace)
+kubernetes_max_creates = 8
+
+# Seconds to wait for a MiniCluster to be ready
+kubernetes_create_timeout = 600
+
+# Entry point group for plugins, and the prefix of plugin modules
+plugin_group = "fluxburst.plugins"
 plugin_prefix = "fluxburst_"
 
-# User home
+# Maximum number of Flux RPCs to have outstanding when fetching job info
+max_inflight_rpcs = 256
+
+# Most jobspecs to write to the KVS in one transaction
+kvs_chunk_size = 512
+
+# Packing small jobs into shared MiniClusters: the most jobs in one
+# MiniCluster, and seconds to wait for more jobs before creating it
+pack_size = 10
+pack_max_wait = 60
+
+# Seconds between checking job states when waiting for jobs
+wait_interval = 5
+
+# Seconds between burst cycles for flux-burst serve
+serve_interval = 30
+
+# Flux job states (flux.constants) and those that have not started running
+job_states = {
+    "NEW": 1,
+    "DEPEND": 2,
+    "PRIORITY": 4,
+    "SCHED": 8,
+    "RUN": 16,
+    "CLEANUP": 32,
+    "INACTIVE": 64,
+}
+pending_states = ["NEW", "DEPEND", "PRIORITY", "SCHED"]
+
+# User home, with a cache of downloads and record of operator installs
 userhome = os.path.expanduser("~/.fluxburst")
+cache_dir = os.path.join(userhome, "cache")
+installed_file = os.path.join(userhome, "installed.json")
 
 # The default GitHub registry with recipes (for docgen)
 github_url = "https://github.com/converged-computing/flux-burst"
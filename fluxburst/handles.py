@@ -3,6 +3,19 @@
 #
 # SPDX-License-Identifier: (MIT)
 
+import collections
+import copy
+import gzip
+import json
+import threading
+import time
+
+import fluxburst.defaults as defaults
+import fluxburst.metrics as metrics
+import fluxburst.tracing as tracing
+import fluxburst.utils as utils
+from fluxburst.logger import logger
+from fluxburst.workload import Workload
 
 # We define a FluxHandle class to also provide a mock handle,
 # meaning we aren't running flux, but can provide fake jobs
@@ -20,24 +33,128 @@ class FluxMock:
         # Default state to return
         self.job_state = kwargs.get("state") or "INACTIVE"
 
+        # A synthetic journal of job events to replay (a list or json file)
+        journal = kwargs.get("journal")
+        if isinstance(journal, str):
+            journal = utils.read_json(journal)
+        self.journal = collections.deque(journal or [])
+
+        # A synthetic workload, and the clock for it (see elapsed)
+        self.workload = get_workload(kwargs.get("workload"))
+        self.speed = kwargs.get("speed", 1.0)
+        self.started = time.time()
+        self.offset = 0.0
+
+        # Counters and spans for the Flux calls we would make (see FluxBurst)
+        self.metrics = metrics.null
+        self.tracer = tracing.null
+
+    def elapsed(self):
+        """
+        Seconds since the start of the workload (times speed, plus any advance).
+        """
+        return (time.time() - self.started) * self.speed + self.offset
+
+    def advance(self, seconds):
+        """
+        Move the workload clock forward, e.g., to see jobs change state.
+        """
+        self.offset += seconds
+
+    def watch_journal(self):
+        """
+        Start the mock journal with events for the listed jobs.
+
+        If a journal was provided, it is replayed instead, and a workload
+        has events for its jobs as they change state.
+        """
+        if self.journal or self.workload is not None:
+            return
+        for job in self.list_jobs()["jobs"]:
+            for name in ["submit", "validate", "depend", "priority"]:
+                self.add_event(job["id"], name, timestamp=job["t_submit"])
+
+    def add_event(self, jobid, name, timestamp=None, context=None):
+        """
+        Add an event to the mock journal, e.g., to simulate a change.
+        """
+        self.journal.append(
+            {
+                "id": jobid,
+                "name": name,
+                "timestamp": timestamp,
+                "context": context or {},
+            }
+        )
+
+    def journal_events(self, timeout=0.0, deadline=None):
+        """
+        Yield journal events that have not been consumed yet.
+        """
+        while self.journal:
+            yield self.journal.popleft()
+        if self.workload is not None:
+            yield from self.workload.events(self.elapsed())
+
     def update_jobspec(self, job):
         """
         Update a jobspec via the kvs
+
+        A job in a workload that is scheduled to a burst will then run.
         """
-        pass
+        self.metrics.count("flux_rpcs", call="update_jobspec")
+        with self.tracer.span("flux.update_jobspec", jobid=job["id"]):
+            self.schedule(job)
+
+    def update_jobspecs(self, jobs, chunk_size=None):
+        """
+        Update jobspecs via the kvs, one transaction per chunk_size jobs.
+        """
+        chunk_size = max(1, chunk_size or defaults.kvs_chunk_size)
+        for start in range(0, len(jobs), chunk_size):
+            chunk = jobs[start : start + chunk_size]
+            self.metrics.count("flux_rpcs", call="update_jobspecs")
+            with self.tracer.span("flux.update_jobspecs", jobs=len(chunk)):
+                for job in chunk:
+                    self.schedule(job)
+        return []
+
+    def schedule(self, job):
+        """
+        Run a job in the workload if it was scheduled to a burst.
+        """
+        if self.workload is None:
+            return
+        if "burst-scheduled" in job["spec"]["attributes"]["system"]:
+            self.workload.schedule(job["id"], self.elapsed())
 
     def state(self, jobid):
-        return self.job_state
+        self.metrics.count("flux_rpcs", call="state")
+        if self.workload is None:
+            return self.job_state
+        with self.tracer.span("flux.state", jobid=jobid):
+            return self.workload.state(jobid, self.elapsed())
+
+    def states(self, jobids, max_inflight=None):
+        """
+        Get the state (string) for a list of jobs, keyed by job id.
+        """
+        return {jobid: self.state(jobid) for jobid in jobids}
 
     def list_jobs(self):
         """
-        List one fake, burstable job.
+        List one fake, burstable job (or the jobs of the workload).
 
         Generated via:
         flux submit -N 4 --cwd /tmp --setattr=burstable hostname
         in the fluxrm/flux-sched:focal container on July 2nd 2023. Note that we
-        only use the high level attributes so hosts, etc. do not matter.
+        only use the high level attributes so hosts, etc. do not matter. The
+        state is set to SCHED (8) so the job looks like it is still pending.
         """
+        self.metrics.count("flux_rpcs", call="list_jobs")
+        if self.workload is not None:
+            with self.tracer.span("flux.list_jobs"):
+                return {"jobs": self.workload.listing(self.elapsed())}
         return {
             "jobs": [
                 {
@@ -50,7 +167,7 @@ class FluxMock:
                     "t_run": 1688329701.709494,
                     "t_cleanup": 1688329701.7517478,
                     "t_inactive": 1688329701.753637,
-                    "state": 64,
+                    "state": 8,
                     "name": "hostname",
                     "cwd": "/tmp",
                     "ntasks": 4,
@@ -68,11 +185,51 @@ class FluxMock:
             ]
         }
 
+    def get_job_infos(self, jobids, max_inflight=None):
+        """
+        Get job info for a list of jobs, keyed by job id.
+
+        Jobs that are not known are skipped.
+        """
+        infos = {}
+        for jobid in jobids:
+            try:
+                infos[jobid] = self.get_job_info(jobid)
+            except (FileNotFoundError, KeyError):
+                continue
+        return infos
+
+    def get_job_listings(self, jobids, max_inflight=None):
+        """
+        Get the listing (no jobspec) for a list of jobs, keyed by job id.
+
+        Jobs that are not known are skipped.
+        """
+        self.metrics.count("flux_rpcs", len(jobids), call="job_listing")
+        if self.workload is None:
+            return {
+                job["id"]: job
+                for job in self.list_jobs()["jobs"]
+                if job["id"] in jobids
+            }
+        listings = {}
+        elapsed = self.elapsed()
+        for jobid in jobids:
+            job = self.workload.jobs.get(jobid)
+            state = job and self.workload.state(jobid, elapsed)
+            if state is not None:
+                listings[jobid] = self.workload.get_listing(job, state)
+        return listings
+
     def get_job_info(self, jobid):
         """
         Get job info. This is job info (the same function called on the container)
         job returned above) in the fluxrm/flux-sched:focal container.
         """
+        self.metrics.count("flux_rpcs", 2, call="job_info")
+        if self.workload is not None:
+            with self.tracer.span("flux.job_info", jobid=jobid):
+                return self.workload.info(jobid, self.elapsed())
         return {
             "id": 17839985524736,
             "userid": 1002,
@@ -83,7 +240,7 @@ class FluxMock:
             "t_run": 1688329701.709494,
             "t_cleanup": 1688329701.7517478,
             "t_inactive": 1688329701.753637,
-            "state": 64,
+            "state": 8,
             "name": "hostname",
             "cwd": "/tmp",
             "ntasks": 4,
@@ -120,7 +277,7 @@ class FluxMock:
                 "_urgency": 16,
                 "_t_submit": 1688329701.680035,
                 "_exception_occurred": False,
-                "_state_id": 64,
+                "_state_id": 8,
                 "_result_id": 1,
                 "_exception": {
                     "occurred": False,
@@ -179,9 +336,26 @@ class FluxMock:
         }
 
 
+def get_workload(workload):
+    """
+    Get a workload for the mock from a Workload, a json file, a list of
+    jobs, or a dict of arguments to generate one (e.g., count and seed).
+    """
+    if workload is None or isinstance(workload, Workload):
+        return workload
+    if isinstance(workload, str):
+        return Workload.load(workload)
+    if isinstance(workload, dict):
+        return Workload.generate(**workload)
+    return Workload(workload)
+
+
 class FluxHandle:
     def __init__(self, handle=None):
         self._handle = handle
+        self._journal = None
+        self.metrics = metrics.null
+        self.tracer = tracing.null
 
     @property
     def handle(self):
@@ -201,22 +375,105 @@ class FluxHandle:
         """
         Get the state (string) for a jobid
         """
+        return self._receive_state(*self._send_state(jobid))
+
+    def states(self, jobids, max_inflight=None):
+        """
+        Get the state (string) for a list of jobs, keyed by job id.
+
+        As with get_job_infos, up to max_inflight RPCs are kept outstanding.
+        """
+        window = max(1, max_inflight or defaults.max_inflight_rpcs)
+        inflight = collections.deque()
+        states = {}
+        for jobid in jobids:
+            inflight.append((jobid, self._send_state(jobid)))
+            if len(inflight) >= window:
+                jobid, futures = inflight.popleft()
+                states[jobid] = self._receive_state(*futures)
+        while inflight:
+            jobid, futures = inflight.popleft()
+            states[jobid] = self._receive_state(*futures)
+        return states
+
+    def _send_state(self, jobid):
+        """
+        Send (but do not wait on) the RPC to get the state of a job.
+
+        The span for the RPC ends when it is received.
+        """
         import flux.job
 
+        self.metrics.count("flux_rpcs", call="state")
+        span = self.tracer.start_span("flux.state", jobid=jobid)
         jobid = flux.job.JobID(jobid)
-        payload = {"id": jobid, "attrs": ["all"]}
-        rpc = flux.job.list.JobListIdRPC(self.handle, "job-list.list-id", payload)
+        payload = {"id": jobid, "attrs": ["state"]}
+        return (
+            flux.job.list.JobListIdRPC(self.handle, "job-list.list-id", payload),
+            span,
+        )
+
+    def _receive_state(self, rpc, span):
+        """
+        Wait on the RPC from _send_state and return the state string.
+        """
+        import flux.job
+
         try:
             jobinfo = rpc.get()
         # The job does not exist, assume completed
         except FileNotFoundError:
             return "INACTIVE"
+        finally:
+            span.end()
 
         # User friendly string from integer
         jobinfo = jobinfo["job"]
         state = jobinfo["state"]
         return flux.job.info.statetostr(state)
 
+    def watch_journal(self):
+        """
+        Start consuming the job-manager journal of job events.
+
+        The full history of active jobs is replayed first, so the
+        consumer of the events can build its view of the queue.
+        """
+        import flux.job
+
+        if self._journal is None:
+            self._journal = flux.job.JournalConsumer(self.handle, full=True).start()
+        return self._journal
+
+    def journal_events(self, timeout=0.0, deadline=None):
+        """
+        Yield journal events until none arrive within the timeout.
+
+        With a deadline (time.time() to stop at) we also stop then, even
+        if events keep arriving, and leave the rest for the next call.
+        """
+        journal = self.watch_journal()
+        while True:
+            wait = timeout
+            if deadline is not None:
+                wait = min(timeout, deadline - time.time())
+                if wait < 0:
+                    return
+            try:
+                event = journal.poll(wait)
+            except TimeoutError:
+                return
+
+            # The journal was stopped
+            if event is None:
+                return
+            yield {
+                "id": int(event.jobid),
+                "name": event.name,
+                "timestamp": event.timestamp,
+                "context": event.context,
+            }
+
     def update_jobspec(self, job):
         """
         Update a jobspec via the kvs
@@ -225,18 +482,67 @@ class FluxHandle:
 
         # This is a workaround because updating the attribute directly
         # does not stick yet.
-        kvs = flux.job.job_kvs(self.handle, job["id"])
-        kvs[kvs.key_at("jobspec")] = job["spec"]
-        kvs.commit()
+        self.metrics.count("flux_rpcs", call="update_jobspec")
+        with self.tracer.span("flux.update_jobspec", jobid=job["id"]):
+            kvs = flux.job.job_kvs(self.handle, job["id"])
+            kvs[kvs.key_at("jobspec")] = job["spec"]
+            kvs.commit()
         return kvs
 
+    def update_jobspecs(self, jobs, chunk_size=None):
+        """
+        Update the jobspecs of many jobs via the kvs, returning ids that failed.
+
+        Instead of a transaction for each job, the jobspecs of chunk_size
+        jobs are put in one transaction and committed together. A commit is
+        all or nothing, so if one fails, the jobs in it are updated one at a
+        time and only those that still fail are returned.
+        """
+        import flux.job
+        import flux.kvs
+
+        chunk_size = max(1, chunk_size or defaults.kvs_chunk_size)
+        failed = []
+        for start in range(0, len(jobs), chunk_size):
+            chunk = jobs[start : start + chunk_size]
+            self.metrics.count("flux_rpcs", call="update_jobspecs")
+            try:
+                with self.tracer.span("flux.update_jobspecs", jobs=len(chunk)):
+                    for job in chunk:
+                        key = f"{flux.job.JobID(job['id']).kvs}.jobspec"
+                        flux.kvs.put(self.handle, key, job["spec"])
+                    flux.kvs.commit(self.handle)
+
+            # Anything put but not committed has the same jobspec we write next
+            except Exception as e:
+                logger.warning(
+                    f"Issue updating {len(chunk)} jobspecs, trying one at a time: {e}"
+                )
+                failed += self.update_each_jobspec(chunk)
+        return failed
+
+    def update_each_jobspec(self, jobs):
+        """
+        Update jobspecs one at a time, returning ids that failed.
+        """
+        failed = []
+        for job in jobs:
+            try:
+                self.update_jobspec(job)
+            except Exception as e:
+                logger.warning(f"Issue updating jobspec for {job['id']}: {e}")
+                failed.append(job["id"])
+        return failed
+
     def list_jobs(self):
         """
         List actual jobs from the flux.job module
         """
         import flux.job
 
-        return flux.job.job_list(self.handle).get()
+        self.metrics.count("flux_rpcs", call="list_jobs")
+        with self.tracer.span("flux.list_jobs"):
+            return flux.job.job_list(self.handle).get()
 
     def get_job_info(self, jobid):
         """
@@ -246,19 +552,366 @@ class FluxHandle:
         This is not yet currently perfectly json serializable, need to
         handle EmptyObject if that is desired.
         """
+        return self._receive_job_info(*self._send_job_info(jobid))
+
+    def get_job_listings(self, jobids, max_inflight=None):
+        """
+        Get the listing (job-list, without the jobspec) for many jobs, keyed by id.
+
+        This is one RPC for each job, and as with get_job_infos, up to
+        max_inflight are kept outstanding. Jobs that are gone are skipped.
+        """
+        window = max(1, max_inflight or defaults.max_inflight_rpcs)
+        inflight = collections.deque()
+        listings = {}
+
+        def collect():
+            jobid, (rpc, span) = inflight.popleft()
+            try:
+                listings[jobid] = rpc.get_job()
+            except FileNotFoundError:
+                logger.debug(f"Job {jobid} no longer exists, skipping.")
+            finally:
+                span.end()
+
+        for jobid in jobids:
+            inflight.append((jobid, self._send_job_listing(jobid)))
+            if len(inflight) >= window:
+                collect()
+        while inflight:
+            collect()
+        return listings
+
+    def _send_job_listing(self, jobid):
+        """
+        Send (but do not wait on) the job-list RPC for a job.
+        """
+        import flux.job
+
+        self.metrics.count("flux_rpcs", call="job_listing")
+        span = self.tracer.start_span("flux.job_listing", jobid=jobid)
+        payload = {"id": flux.job.JobID(jobid), "attrs": ["all"]}
+        return (
+            flux.job.list.JobListIdRPC(self.handle, "job-list.list-id", payload),
+            span,
+        )
+
+    def get_job_infos(self, jobids, max_inflight=None):
+        """
+        Get job info for many jobs, keyed by job id.
+
+        Each job needs a job-list and a KVS lookup. Instead of waiting on
+        each in turn, we keep up to max_inflight RPCs outstanding and
+        collect the oldest as new ones are sent. Jobs that disappear
+        between listing and lookup are skipped.
+        """
+        max_inflight = max_inflight or defaults.max_inflight_rpcs
+
+        # Each job has two RPCs (job-list and KVS) in flight
+        window = max(1, max_inflight // 2)
+        inflight = collections.deque()
+        infos = {}
+
+        def collect():
+            jobid, futures = inflight.popleft()
+            try:
+                infos[jobid] = self._receive_job_info(*futures)
+            except FileNotFoundError:
+                logger.debug(f"Job {jobid} no longer exists, skipping.")
+
+        for jobid in jobids:
+            inflight.append((jobid, self._send_job_info(jobid)))
+            if len(inflight) >= window:
+                collect()
+        while inflight:
+            collect()
+        return infos
+
+    def _send_job_info(self, jobid):
+        """
+        Send (but do not wait on) the RPCs needed for a job info.
+
+        The span for the RPCs ends when both are received.
+        """
         import flux.job
 
+        self.metrics.count("flux_rpcs", 2, call="job_info")
+        span = self.tracer.start_span("flux.job_info", jobid=jobid)
         fluxjob = flux.job.JobID(jobid)
         payload = {"id": fluxjob, "attrs": ["all"]}
         rpc = flux.job.list.JobListIdRPC(self.handle, "job-list.list-id", payload)
-        job = rpc.get_job()
-
-        # Job info, timing, priority, etc.
-        job["info"] = rpc.get_jobinfo().__dict__
-        job["info"]["_exception"] = job["info"]["_exception"].__dict__
-        job["info"]["_annotations"] = job["info"]["_annotations"].__dict__
 
         # the KVS will have annotations!
-        kvs = flux.job.job_kvs(self.handle, jobid)
-        job["spec"] = kvs.get("jobspec")
+        lookup = flux.job.job_kvs_lookup(self.handle, fluxjob, keys=["jobspec"])
+        return rpc, lookup, span
+
+    def _receive_job_info(self, rpc, lookup, span):
+        """
+        Wait on the RPCs from _send_job_info and assemble the job info.
+        """
+        try:
+            job = rpc.get_job()
+
+            # Job info, timing, priority, etc.
+            job["info"] = rpc.get_jobinfo().__dict__
+            job["info"]["_exception"] = job["info"]["_exception"].__dict__
+            job["info"]["_annotations"] = job["info"]["_annotations"].__dict__
+            job["spec"] = lookup.get()["jobspec"]
+        finally:
+            span.end()
         return job
+
+
+class RecordingFluxHandle:
+    """
+    Wrap a Flux handle and record every call to a log, to replay later.
+
+    Calls to list_jobs, get_job_info(s), get_job_listings, state(s),
+    update_jobspec(s) and journal_events are written (with the arguments, response and seconds
+    taken) as one json line each. A filename ending in .gz is compressed.
+    Anything else goes to the wrapped handle.
+    """
+
+    def __init__(self, filename, flux=None, handle=None):
+        self.flux = flux or FluxHandle(handle)
+        self.filename = filename
+        self.started = time.time()
+        self._file = open_log(filename, "wt")
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name == "flux":
+            raise AttributeError(name)
+        return getattr(self.flux, name)
+
+    # Metrics and spans are made by the wrapped handle (see FluxBurst.set_metrics)
+    @property
+    def metrics(self):
+        return self.flux.metrics
+
+    @metrics.setter
+    def metrics(self, sink):
+        self.flux.metrics = sink
+
+    @property
+    def tracer(self):
+        return self.flux.tracer
+
+    @tracer.setter
+    def tracer(self, tracer):
+        self.flux.tracer = tracer
+
+    def record(self, call, args, response, seconds):
+        """
+        Write one call to the log.
+
+        Responses keyed by job id are written as [jobid, value] pairs,
+        since json would change the ids to strings.
+        """
+        if isinstance(response, dict) and call in [
+            "get_job_infos",
+            "get_job_listings",
+            "states",
+        ]:
+            response = list(response.items())
+        line = {
+            "call": call,
+            "args": args,
+            "response": response,
+            "time": round(time.time() - self.started, 6),
+            "seconds": round(seconds, 6),
+        }
+        line = json.dumps(line, separators=(",", ":"), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def call(self, call, args, *extra, **kwargs):
+        start = time.time()
+        response = getattr(self.flux, call)(*args, *extra, **kwargs)
+        self.record(call, args, response, time.time() - start)
+        return response
+
+    def list_jobs(self):
+        return self.call("list_jobs", [])
+
+    def get_job_info(self, jobid):
+        return self.call("get_job_info", [jobid])
+
+    def get_job_infos(self, jobids, max_inflight=None):
+        return self.call("get_job_infos", [list(jobids)], max_inflight=max_inflight)
+
+    def get_job_listings(self, jobids, max_inflight=None):
+        return self.call("get_job_listings", [list(jobids)], max_inflight=max_inflight)
+
+    def state(self, jobid):
+        return self.call("state", [jobid])
+
+    def states(self, jobids, max_inflight=None):
+        return self.call("states", [list(jobids)], max_inflight=max_inflight)
+
+    def update_jobspec(self, job):
+        start = time.time()
+        self.flux.update_jobspec(job)
+        self.record("update_jobspec", [job["id"]], None, time.time() - start)
+
+    def update_jobspecs(self, jobs, chunk_size=None):
+        start = time.time()
+        failed = self.flux.update_jobspecs(jobs, chunk_size=chunk_size)
+        jobids = [job["id"] for job in jobs]
+        self.record("update_jobspecs", [jobids], failed, time.time() - start)
+        return failed
+
+    def journal_events(self, timeout=0.0, deadline=None):
+        start = time.time()
+        events = list(self.flux.journal_events(timeout=timeout, deadline=deadline))
+        self.record("journal_events", [timeout], events, time.time() - start)
+        return iter(events)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayFluxHandle:
+    """
+    Replay a log from RecordingFluxHandle, without a Flux instance.
+
+    Responses are matched to calls by what they ask for, so a client that
+    changed can still replay the log: job info and states are looked up by
+    job id, and listings and journal events are given back in the order
+    they were recorded (repeating the last). With latency (a scale, 1.0
+    is the original) each call sleeps for the time the next recorded call
+    of its kind took, in the order recorded (for a batch, the time per job
+    times the number of jobs asked for).
+    """
+
+    def __init__(self, filename, latency=0.0):
+        self.filename = filename
+        self.latency = latency or 0.0
+        self.listings = collections.deque()
+        self.journal = collections.deque()
+        self.infos = {}
+        self.job_listings = {}
+        self.job_states = collections.defaultdict(collections.deque)
+        self.seconds = collections.defaultdict(collections.deque)
+        self.updated = []
+        self.load()
+
+    def load(self):
+        """
+        Read the log into responses by call (and job id).
+        """
+        with open_log(self.filename, "rt") as fd:
+            for line in fd:
+                line = json.loads(line)
+                call, args, response = line["call"], line["args"], line["response"]
+
+                # Batch calls give the seconds for each job
+                seconds = line["seconds"]
+                if call in ["get_job_infos", "get_job_listings", "states"]:
+                    seconds = seconds / max(len(args[0]), 1)
+                    call = call[:-1]
+                self.seconds[call].append(seconds)
+
+                if call == "list_jobs":
+                    self.listings.append(response)
+                elif call == "journal_events":
+                    self.journal.append(response)
+                elif call == "get_job_info":
+                    pairs = response if line["call"] != call else [[args[0], response]]
+                    self.infos.update({int(jobid): info for jobid, info in pairs})
+                elif call == "get_job_listing":
+                    self.job_listings.update(
+                        {int(jobid): job for jobid, job in response}
+                    )
+                elif call == "state":
+                    pairs = response if line["call"] != call else [[args[0], response]]
+                    for jobid, state in pairs:
+                        self.job_states[int(jobid)].append(state)
+
+    def sleep(self, call, count=1):
+        """
+        Sleep for the next recorded time of a call (count times), scaled by latency.
+        """
+        if self.latency:
+            seconds = self.next(self.seconds.get(call), 0)
+            time.sleep(seconds * count * self.latency)
+
+    def next(self, responses, default=None):
+        """
+        Give back the next response, repeating the last.
+        """
+        if not responses:
+            return default
+        if len(responses) > 1:
+            return responses.popleft()
+        return responses[0]
+
+    def list_jobs(self):
+        self.sleep("list_jobs")
+        return self.next(self.listings, {"jobs": []})
+
+    def get_job_info(self, jobid):
+        self.sleep("get_job_info")
+        if jobid not in self.infos:
+            raise FileNotFoundError(f"Job {jobid} is not in the recording")
+        return copy.deepcopy(self.infos[jobid])
+
+    def get_job_infos(self, jobids, max_inflight=None):
+        jobids = [jobid for jobid in jobids if jobid in self.infos]
+        self.sleep("get_job_info", len(jobids))
+        return {jobid: copy.deepcopy(self.infos[jobid]) for jobid in jobids}
+
+    def get_job_listings(self, jobids, max_inflight=None):
+        """
+        Listings are from the recording, or the job info (without the jobspec).
+        """
+        listings = {}
+        for jobid in jobids:
+            if jobid in self.job_listings:
+                listings[jobid] = copy.deepcopy(self.job_listings[jobid])
+            elif jobid in self.infos:
+                info = self.infos[jobid]
+                listings[jobid] = {
+                    key: copy.deepcopy(value)
+                    for key, value in info.items()
+                    if key not in ["info", "spec"]
+                }
+        self.sleep("get_job_listing", len(listings))
+        return listings
+
+    def state(self, jobid):
+        self.sleep("state")
+        return self.next(self.job_states.get(jobid), "INACTIVE")
+
+    def states(self, jobids, max_inflight=None):
+        self.sleep("state", len(jobids))
+        return {
+            jobid: self.next(self.job_states.get(jobid), "INACTIVE") for jobid in jobids
+        }
+
+    def update_jobspec(self, job):
+        self.sleep("update_jobspec")
+        self.updated.append(job["id"])
+
+    def update_jobspecs(self, jobs, chunk_size=None):
+        self.sleep("update_jobspecs")
+        self.updated += [job["id"] for job in jobs]
+        return []
+
+    def watch_journal(self):
+        pass
+
+    def journal_events(self, timeout=0.0, deadline=None):
+        self.sleep("journal_events")
+        return iter(self.journal.popleft() if self.journal else [])
+
+
+def open_log(filename, mode):
+    """
+    Open a log of Flux calls, compressed if it ends in .gz
+    """
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode)
+    return open(filename, mode)
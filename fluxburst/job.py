@@ -0,0 +1,140 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+
+class BurstJob:
+    """
+    A compact record of a job selected for bursting.
+
+    We only keep what scheduling and plugins need: the id, counts, command
+    and jobspec attributes, and not the rest of the job info (timing,
+    annotations, etc.). The jobspec is only needed to update the KVS, so it
+    is dropped once written (see unload) and looked up again by a loader
+    (called once, when it is asked for). As with the job info, fields can
+    be accessed by key (job["nnodes"] or job["spec"]["attributes"]) so
+    selectors and plugins work with either.
+    """
+
+    __slots__ = (
+        "id",
+        "nnodes",
+        "ntasks",
+        "ncores",
+        "command",
+        "attributes",
+        "_spec",
+        "_loader",
+    )
+
+    # Fields that can be accessed by key (spec is loaded when asked for)
+    fields = ("id", "nnodes", "ntasks", "ncores", "command", "attributes")
+
+    def __init__(
+        self,
+        id,
+        nnodes=0,
+        ntasks=0,
+        ncores=0,
+        command=None,
+        attributes=None,
+        spec=None,
+        loader=None,
+    ):
+        self.id = id
+        self.nnodes = nnodes
+        self.ntasks = ntasks
+        self.ncores = ncores
+        self.command = command or []
+        self.attributes = attributes if attributes is not None else {"system": {}}
+        self._spec = spec
+        if spec is not None:
+            spec["attributes"] = self.attributes
+        self._loader = loader
+
+    @classmethod
+    def from_info(cls, info, loader=None):
+        """
+        Make a record from job info with the jobspec (see get_job_info).
+
+        With a loader, the jobspec is not kept, and loaded again if needed.
+        """
+        spec = info.get("spec") or {}
+        tasks = spec.get("tasks") or [{}]
+        return cls(
+            info["id"],
+            nnodes=info.get("nnodes"),
+            ntasks=info.get("ntasks"),
+            ncores=info.get("ncores"),
+            command=tasks[0].get("command"),
+            attributes=spec.get("attributes"),
+            spec=None if loader else spec,
+            loader=loader,
+        )
+
+    @property
+    def spec(self):
+        """
+        The full jobspec, loaded the first time it is needed.
+
+        The attributes are the same dict as job.attributes, so a change
+        to one (e.g., marking the job as scheduled) is seen in both. A
+        loaded jobspec is the one we wrote, so its attributes are used.
+        """
+        if self._spec is None:
+            spec = self._loader(self.id) if self._loader else {}
+            self.attributes = spec.setdefault("attributes", self.attributes)
+            self._spec = spec
+            self._loader = None
+        return self._spec
+
+    def unload(self, loader=None):
+        """
+        Drop the jobspec (e.g., once it is written), keeping the compact fields.
+
+        The shell rlimits (the bulk of the attributes) are dropped too. If the
+        jobspec is asked for again, the loader gives it (without a loader, it
+        only has the attributes).
+        """
+        self._spec = None
+        self._loader = loader
+        self.attributes = get_compact_attributes(self.attributes)
+
+    def __getitem__(self, key):
+        if key == "spec":
+            return self.spec
+        if key in self.fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key == "spec" or key in self.fields
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __str__(self):
+        return f"[burst-job:{self.id}]"
+
+    def __repr__(self):
+        return str(self)
+
+
+def get_compact_attributes(attributes):
+    """
+    Get a copy of jobspec attributes without the shell rlimits.
+
+    Only the dicts on the way to the rlimits are copied, so the original
+    (e.g., a jobspec that is still in use) is not changed.
+    """
+    options = attributes.get("system", {}).get("shell", {}).get("options", {})
+    if "rlimit" not in options:
+        return attributes
+    options = {k: v for k, v in options.items() if k != "rlimit"}
+    shell = dict(attributes["system"]["shell"], options=options)
+    system = dict(attributes["system"], shell=shell)
+    return dict(attributes, system=system)
@@ -4,13 +4,21 @@
 # SPDX-License-Identifier: (MIT)
 
 import base64
+import hashlib
 import os
-
-import requests
-from kubernetes import client as kubernetes_client
+import re
+import threading
+import time
 
 import fluxburst.defaults as defaults
 import fluxburst.utils as utils
+from fluxburst.logger import logger
+
+# Names of kubernetes objects (like namespaces) must be a valid DNS label
+dns_label = "[a-z0-9]([-a-z0-9]*[a-z0-9])?"
+
+# Plugins (in threads) update the cache index and installed file together
+files_lock = threading.Lock()
 
 
 def get_minicluster(
@@ -37,12 +45,14 @@ def get_minicluster(
     zeromq=False,
     quiet=False,
     strict=False,
+    launcher=False,
 ):
     """
     Get a MiniCluster CRD as a dictionary
 
     Limits should be slightly below actual pod resources. The curve cert and broker config
-    are required, since we need this external cluster to connect to ours!
+    are required, since we need this external cluster to connect to ours! A launcher
+    command is expected to submit its own jobs to the MiniCluster.
     """
     flags = flags or "-ompi=openmpi@5 -c 1 -o cpu-affinity=per-task"
     image = image or "ghcr.io/flux-framework/flux-restful-api"
@@ -61,6 +71,9 @@ def get_minicluster(
         container["resources"]["limits"]["memory"] = memory_limit
         container["resources"]["requests"]["memory"] = memory_limit
 
+    if launcher:
+        container["launcher"] = True
+
     # Do we have a custom flux user for the container?
     if flux_user:
         container["flux_user"] = {"name": flux_user}
@@ -75,7 +88,7 @@ def get_minicluster(
         "flux": {
             "option_flags": flags,
             "connect_timeout": "5s",
-            "log_level": log_level,
+            "log_level": to_int(log_level),
         },
     }
 
@@ -115,6 +128,156 @@ def get_minicluster(
     return mc, container
 
 
+def get_minicluster_crd(minicluster, container):
+    """
+    Get the MiniCluster custom resource to submit, from get_minicluster.
+
+    Keys are changed to the camel case of the custom resource definition.
+    """
+    spec = {k: v for k, v in minicluster.items() if k not in ["name", "namespace"]}
+    spec["containers"] = [container]
+    return {
+        "apiVersion": f"{defaults.minicluster_group}/{defaults.minicluster_version}",
+        "kind": "MiniCluster",
+        "metadata": {
+            "name": minicluster["name"],
+            "namespace": minicluster["namespace"],
+        },
+        "spec": to_camel_case(spec),
+    }
+
+
+class MiniClusterTemplate:
+    """
+    A MiniCluster spec that is built (and validated) once, and rendered for each job.
+
+    The parts that are the same for every job (flux options, the bursting
+    block, secrets, image and limits) are built into the custom resource
+    once. Rendering only adds the name, command and size, and the dicts
+    shared between rendered specs should be treated as read only.
+    """
+
+    def __init__(self, namespace=None, **kwargs):
+        """
+        Create the template with the arguments to get_minicluster (except
+        the command, size, tasks, name and launcher, which are given per job).
+        """
+        minicluster, container = get_minicluster(None, namespace=namespace, **kwargs)
+        validate_minicluster(minicluster, container)
+        crd = get_minicluster_crd(minicluster, container)
+        self.namespace = namespace
+        self.metadata = crd["metadata"]
+        self.spec = crd["spec"]
+        self.container = self.spec.pop("containers")[0]
+        self.header = {k: v for k, v in crd.items() if k not in ["metadata", "spec"]}
+
+    @classmethod
+    def from_params(cls, params, lead_jobname=None):
+        """
+        Create the template from the dataclass of plugin parameters.
+        """
+        return cls(
+            namespace=params.namespace,
+            memory_limit=params.memory_limit,
+            cpu_limit=params.cpu_limit,
+            broker_toml=params.broker_toml,
+            image=params.image,
+            wrap=params.wrap,
+            log_level=params.log_level,
+            flux_user=params.flux_user,
+            lead_host=params.lead_host,
+            lead_port=params.lead_port,
+            munge_secret_name=params.munge_secret_name,
+            curve_cert_secret_name=params.curve_cert_secret_name,
+            lead_jobname=lead_jobname,
+            lead_size=params.lead_size,
+        )
+
+    def render(self, command, size, name, tasks=None, launcher=False):
+        """
+        Render the MiniCluster custom resource for one job.
+        """
+        spec = dict(self.spec)
+        spec["size"] = size
+        if tasks is not None:
+            spec["tasks"] = tasks
+
+        container = dict(self.container)
+        container["command"] = command
+        if launcher:
+            container["launcher"] = True
+        spec["containers"] = [container]
+
+        # The bursting block lists this cluster
+        if "bursting" in spec["flux"]:
+            spec["flux"] = dict(spec["flux"])
+            spec["flux"]["bursting"] = dict(spec["flux"]["bursting"])
+            spec["flux"]["bursting"]["clusters"] = [{"size": size, "name": name}]
+
+        crd = dict(self.header)
+        crd["metadata"] = dict(self.metadata, name=name)
+        crd["spec"] = spec
+        return crd
+
+    def render_many(self, specs):
+        """
+        Render custom resources for many jobs.
+
+        Each spec is a dict of arguments to render.
+        """
+        return [self.render(**spec) for spec in specs]
+
+
+def validate_minicluster(minicluster, container):
+    """
+    Validate the parts of a MiniCluster that are the same for every job.
+
+    This raises a ValueError for the first issue found.
+    """
+    namespace = minicluster.get("namespace")
+    if not namespace or len(namespace) > 63 or not re.fullmatch(dns_label, namespace):
+        raise ValueError(f"Namespace {namespace} is not a valid kubernetes name.")
+    if not isinstance(container.get("image"), str) or not container["image"]:
+        raise ValueError(f"Image {container.get('image')} must be a non-empty string.")
+
+    log_level = minicluster["flux"]["log_level"]
+    if not isinstance(log_level, int) or not 0 <= log_level <= 7:
+        raise ValueError(f"Log level {log_level} must be an integer from 0 to 7.")
+    for kind, value in container.get("resources", {}).get("limits", {}).items():
+        if not isinstance(value, (int, float, str)):
+            raise ValueError(f"The {kind} limit {value} must be a number or string.")
+
+    bursting = minicluster["flux"].get("bursting")
+    if bursting and not 0 < bursting["lead_broker"]["port"] < 65536:
+        raise ValueError(f"Lead port {bursting['lead_broker']['port']} is not valid.")
+
+
+def to_int(value):
+    """
+    Convert a string with an integer (e.g., from a FLUXBURST_* environment
+    variable) to an int, and leave anything else for validation.
+    """
+    if isinstance(value, str) and re.fullmatch("[-+]?[0-9]+", value.strip()):
+        return int(value)
+    return value
+
+
+def to_camel_case(obj):
+    """
+    Change the keys of a dictionary (and nested) from snake to camel case.
+    """
+    if isinstance(obj, list):
+        return [to_camel_case(item) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    updated = {}
+    for key, value in obj.items():
+        first, *rest = key.split("_")
+        key = first + "".join(word.capitalize() for word in rest)
+        updated[key] = to_camel_case(value)
+    return updated
+
+
 def ensure_curve_cert(curve_cert):
     """
     Ensure we are provided with an existing curve certificate we can load.
@@ -132,9 +295,7 @@ def ensure_flux_operator_yaml(flux_operator_yaml):
     """
     # flux operator yaml default is current from main
     if not flux_operator_yaml:
-        flux_operator_yaml = utils.get_tmpfile(prefix="flux-operator") + ".yaml"
-        r = requests.get(defaults.flux_operator_yaml, allow_redirects=True)
-        utils.write_file(r.text, flux_operator_yaml)
+        flux_operator_yaml = get_cached_yaml(defaults.flux_operator_yaml)
 
     # Ensure it really really exists
     flux_operator_yaml = os.path.abspath(flux_operator_yaml)
@@ -143,10 +304,82 @@ def ensure_flux_operator_yaml(flux_operator_yaml):
     return flux_operator_yaml
 
 
+def get_cached_yaml(url, ttl=None):
+    """
+    Get a yaml file from a url, using the cache if we can.
+
+    Files are cached by content hash. Within ttl seconds of a download the
+    cached file is used as is, and after we ask the server if it changed
+    (with the ETag) and only download it again if it did.
+    """
+    import requests
+
+    ttl = defaults.flux_operator_ttl if ttl is None else ttl
+    index_file = os.path.join(defaults.cache_dir, "index.json")
+    index = utils.read_json(index_file) if os.path.exists(index_file) else {}
+
+    entry = index.get(url)
+    path = entry and os.path.join(defaults.cache_dir, entry["hash"] + ".yaml")
+    if path and not os.path.exists(path):
+        entry = path = None
+    if entry and time.time() - entry["fetched"] < ttl:
+        return path
+
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    try:
+        r = requests.get(url, headers=headers, allow_redirects=True)
+        if r.status_code != 304:
+            r.raise_for_status()
+    except requests.RequestException as e:
+        if not path:
+            raise
+        logger.warning(f"Issue checking {url}: {e}, using cached file.")
+        return path
+
+    if r.status_code != 304:
+        digest = hashlib.sha256(r.content).hexdigest()
+        path = os.path.join(defaults.cache_dir, digest + ".yaml")
+        utils.mkdir_p(defaults.cache_dir)
+        utils.replace_file(r.content, path, mode="wb")
+        entry = {"hash": digest, "etag": r.headers.get("ETag")}
+    entry["fetched"] = time.time()
+    with files_lock:
+        index = utils.read_json(index_file) if os.path.exists(index_file) else {}
+        index[url] = entry
+        utils.replace_json(index, index_file)
+    return path
+
+
+def get_installed(key):
+    """
+    Get the hash of the operator yaml installed to a cluster, if we know it.
+    """
+    if not os.path.exists(defaults.installed_file):
+        return
+    return utils.read_json(defaults.installed_file).get(key)
+
+
+def set_installed(key, digest):
+    """
+    Record the hash of the operator yaml installed to a cluster.
+    """
+    utils.mkdir_p(defaults.userhome)
+    with files_lock:
+        installed = {}
+        if os.path.exists(defaults.installed_file):
+            installed = utils.read_json(defaults.installed_file)
+        installed[key] = digest
+        utils.replace_json(installed, defaults.installed_file)
+
+
 def create_secret(path, secret_path, name, namespace, mode="r"):
     """
     Create a secret
     """
+    from kubernetes import client as kubernetes_client
+
     # Configureate ConfigMap metadata
     metadata = kubernetes_client.V1ObjectMeta(
         name=name,
@@ -4,15 +4,19 @@
 # SPDX-License-Identifier: (MIT)
 
 
+import collections
+import itertools
 import os
+import shlex
 import socket
+import threading
+import time
 
-from fluxoperator.client import FluxMiniCluster
-from kubernetes import client as kubernetes_client
-from kubernetes import utils as k8sutils
-from kubernetes.client.rest import ApiException
-
+import fluxburst.defaults as defaults
 import fluxburst.kubernetes.cluster as helpers
+import fluxburst.utils as utils
+from fluxburst.kubernetes.pool import WarmPool
+from fluxburst.kubernetes.watch import MiniClusterWatcher
 from fluxburst.logger import logger
 from fluxburst.plugins import BurstPlugin
 
@@ -22,20 +26,80 @@ class KubernetesBurstPlugin(BurstPlugin):
     An additional wrapper to the plugin that adds support for the Flux Operator
     """
 
+    def __init__(self, dataclass, **kwargs):
+        super().__init__(dataclass, **kwargs)
+
+        # When we first saw each job, for holding jobs to pack together
+        self.queued_at = {}
+
+        # Kubernetes API clients, by cluster name (see get_kubectl)
+        self.apis = {}
+
+        # Watchers of MiniClusters coming up, by kubectl and namespace, and the
+        # result (or exception) of the last MiniClusters created, by job id
+        self.watchers = {}
+        self._watchers_lock = threading.Lock()
+        self.results = {}
+
+        # Namespaces and secrets provisioned, by cluster and namespace, and
+        # content hashes of files, by path, modified time and size
+        self.provisioned = {}
+        self.file_hashes = {}
+
+        # The MiniCluster spec for all jobs (see get_template)
+        self.template = None
+
+        # An optional pool of idle MiniClusters (see ensure_warm_pool)
+        self.warm_pool = None
+        self._warm_count = itertools.count()
+
+        # Warm MiniClusters we are using, by job id (or name for a request)
+        self.warm_clusters = {}
+
     def ensure_namespace(self, kubectl):
         """
         Use the instantiated kubectl to ensure the cluster namespace exists.
+
+        We remember the namespaces we ensured for each cluster, so this is
+        only done once.
         """
+        from kubernetes import client as kubernetes_client
+        from kubernetes.client.rest import ApiException
+
+        provisioned = self.get_provisioned(kubectl)
+        if provisioned["namespace"]:
+            return
         try:
-            kubectl.create_namespace(
-                kubernetes_client.V1Namespace(
-                    metadata=kubernetes_client.V1ObjectMeta(name=self.params.namespace)
+            with self.tracer.span(
+                "kubernetes.create_namespace", namespace=self.params.namespace
+            ):
+                kubectl.create_namespace(
+                    kubernetes_client.V1Namespace(
+                        metadata=kubernetes_client.V1ObjectMeta(
+                            name=self.params.namespace
+                        )
+                    )
                 )
-            )
-        except Exception:
-            logger.warning(
-                f"🥵️ Issue creating namespace {self.params.namespace}, assuming already exists."
-            )
+        except ApiException as e:
+            if e.status != 409:
+                logger.warning(
+                    f"🥵️ Issue creating namespace {self.params.namespace}: {e}"
+                )
+                return
+        provisioned["namespace"] = True
+
+    def get_provisioned(self, kubectl):
+        """
+        Get what we have provisioned for our namespace in the cluster.
+
+        This holds if the namespace exists, and the content hash of each
+        secret we created (by secret name).
+        """
+        key = (kubectl.api_client.configuration.host, self.params.namespace)
+        with self._watchers_lock:
+            if key not in self.provisioned:
+                self.provisioned[key] = {"namespace": False, "secrets": {}}
+            return self.provisioned[key]
 
     def validate(self):
         """
@@ -67,6 +131,13 @@ class KubernetesBurstPlugin(BurstPlugin):
                     f"Provided munge key {self.params.munge_key} does not exist."
                 )
                 return False
+
+        # The MiniCluster spec is validated once, here
+        try:
+            self.get_template()
+        except ValueError as e:
+            logger.warning(f"MiniCluster spec is not valid: {e}")
+            return False
         return True
 
     def check_configs(self):
@@ -83,14 +154,35 @@ class KubernetesBurstPlugin(BurstPlugin):
     def install_flux_operator(self, kubectl, flux_operator_yaml):
         """
         Install the flux operator yaml
+
+        We record the hash of the yaml installed to each cluster, and skip
+        the install if the same yaml was already installed.
         """
+        from kubernetes import utils as k8sutils
+
+        key = kubectl.api_client.configuration.host
+        digest = utils.get_file_hash(flux_operator_yaml)
+        if helpers.get_installed(key) == digest:
+            logger.debug(f"The operator is already installed to {key}.")
+            return
+
         try:
-            k8sutils.create_from_yaml(kubectl.api_client, flux_operator_yaml)
+            with self.tracer.span("kubernetes.install_operator"):
+                k8sutils.create_from_yaml(kubectl.api_client, flux_operator_yaml)
             logger.info("Installed the operator.")
+        except k8sutils.FailToCreateError as exc:
+            logger.warning(
+                f"Issue installing the operator: {exc}, assuming already exists"
+            )
+            # Only conflicts (already exists) mean it is installed
+            if any(e.status != 409 for e in exc.api_exceptions):
+                return
         except Exception as exc:
             logger.warning(
                 f"Issue installing the operator: {exc}, assuming already exists"
             )
+            return
+        helpers.set_installed(key, digest)
 
     def run(self, request_burst=False, nodes=None, tasks=None):
         """
@@ -100,6 +192,9 @@ class KubernetesBurstPlugin(BurstPlugin):
         must be provided to request a cluster in advance (that jobs can
         be run on).
         """
+        # Warm clusters of jobs that are done go back to the pool
+        self.release_finished_warm_clusters()
+
         # Exit early if no jobs to burst
         if not self.jobs and not request_burst:
             logger.info(f"Plugin {self.name} has no jobs to burst.")
@@ -120,120 +215,547 @@ class KubernetesBurstPlugin(BurstPlugin):
             self.check_configs()
 
         # This call registers the name of the cluster to self.clusters
-        cli = self.create_cluster()
-        kubectl = cli.get_k8s_client()
+        kubectl = self.get_kubectl()
 
         # Install the operator!
         self.install_flux_operator(kubectl, foyaml)
+        self.ensure_warm_pool(kubectl)
 
         # Are we requesting or running jobs?
         if request_burst:
-            self.create_minicluster(kubectl, "sleep infinity", nodes, tasks)
+            if not self.acquire_warm_cluster(nodes):
+                self.create_minicluster(kubectl, "sleep infinity", nodes, tasks)
         else:
             self.run_jobs(kubectl)
 
+    def get_kubectl(self):
+        """
+        Get the kubernetes client (CoreV1Api) for the cluster.
+
+        The first time, we create (or get) the cluster and make one ApiClient
+        with a larger connection pool, shared by the core and custom objects
+        clients. These are cached by cluster name, so repeated bursts reuse
+        the same connections.
+        """
+        from kubernetes import client as kubernetes_client
+
+        key = getattr(self.params, "cluster_name", None) or self.params.name
+        if key in self.apis:
+            return self.apis[key]["core"]
+
+        with self.tracer.span("kubernetes.get_cluster", cluster=key):
+            cli = self.create_cluster()
+            kubectl = cli.get_k8s_client()
+        configuration = kubectl.api_client.configuration
+        configuration.connection_pool_maxsize = defaults.kubernetes_pool_maxsize
+        api_client = kubernetes_client.ApiClient(configuration)
+        self.apis[key] = self.new_apis(kubernetes_client.CoreV1Api(api_client))
+        return self.apis[key]["core"]
+
+    def new_apis(self, kubectl):
+        """
+        Make the custom objects client to go with a kubectl.
+        """
+        from kubernetes import client as kubernetes_client
+
+        return {
+            "core": kubectl,
+            "crd": kubernetes_client.CustomObjectsApi(kubectl.api_client),
+        }
+
+    def get_apis(self, kubectl):
+        """
+        Get the cached clients for a kubectl, or new ones if it isn't ours.
+        """
+        for apis in self.apis.values():
+            if apis["core"] is kubectl:
+                return apis
+        return self.new_apis(kubectl)
+
+    def refresh_clusters(self, clusters):
+        """
+        Update known clusters from a list of those removed, their clients
+        and MiniCluster watchers.
+        """
+        for name in clusters:
+            apis = self.apis.pop(name, None)
+            if apis is not None:
+                self.stop_watchers(apis["core"])
+        super().refresh_clusters(clusters)
+
+    def ensure_warm_pool(self, kubectl):
+        """
+        Create the pool of warm MiniClusters, if the parameters ask for one.
+
+        warm_pool_sizes is a list (or comma separated string) of MiniCluster
+        sizes (nodes) to keep idle, with warm_pool_min (default 1) and
+        warm_pool_max idle for each size, and warm_pool_ttl seconds before
+        an idle cluster over the minimum is deleted. Warm clusters are
+        created like a requested burst, running "sleep infinity".
+        """
+        sizes = getattr(self.params, "warm_pool_sizes", None)
+        if not sizes or self.warm_pool is not None:
+            return
+        if self.params.isolated_burst:
+            logger.warning("A warm pool cannot be used for an isolated burst.")
+            return
+        if isinstance(sizes, str):
+            sizes = [size for size in sizes.split(",") if size.strip()]
+
+        def create(size):
+            name = f"{self.params.name}-warm-{size}-{next(self._warm_count)}"
+            handle = self.create_minicluster(
+                kubectl, "sleep infinity", size, size, name=name
+            )
+            if handle.wait(0):
+                return name
+            self.delete_minicluster(kubectl, name)
+
+        min_size = int(getattr(self.params, "warm_pool_min", None) or 1)
+        max_size = getattr(self.params, "warm_pool_max", None)
+        ttl = getattr(self.params, "warm_pool_ttl", None)
+        self.warm_pool = WarmPool(
+            create,
+            lambda name: self.delete_minicluster(kubectl, name),
+            sizes,
+            min_size=min_size,
+            max_size=max_size and int(max_size),
+            ttl=ttl and float(ttl),
+        )
+        self.warm_pool.refill()
+
+    def acquire_warm_cluster(self, nodes, key=None):
+        """
+        Take a warm MiniCluster with at least nodes from the pool, if we have one.
+
+        A warm MiniCluster is already connected to the lead broker, so burst
+        work does not need to wait for a new cluster. This is only done for
+        a burst that is not isolated (an isolated MiniCluster runs one job
+        command). The cluster is kept under key (e.g., the job id, or its
+        name) until it is released, at the latest on unburst.
+        """
+        if self.warm_pool is None or self.params.isolated_burst:
+            return
+        name = self.warm_pool.acquire(nodes)
+        if name:
+            logger.info(f"Using warm MiniCluster {name} for {nodes} nodes.")
+            self.warm_clusters[key or name] = name
+        return name
+
+    def release_warm_clusters(self, keys=None):
+        """
+        Give warm MiniClusters we are done with back to the pool.
+
+        The pool keeps a cluster idle (up to warm_pool_max for the size,
+        for warm_pool_ttl) or deletes it. Without keys, all are released.
+        """
+        if self.warm_pool is None:
+            return
+        keys = list(self.warm_clusters) if keys is None else keys
+        for key in keys:
+            name = self.warm_clusters.pop(key, None)
+            if name:
+                self.warm_pool.release(name)
+
+    def release_finished_warm_clusters(self):
+        """
+        Release the warm MiniClusters of jobs that are done (INACTIVE).
+
+        Job states come from the Flux handle of the client. A cluster for a
+        request (kept by its name) is only released on unburst.
+        """
+        jobids = [key for key in self.warm_clusters if not isinstance(key, str)]
+        if not jobids or self.flux is None:
+            return
+        states = self.flux.states(jobids)
+        self.release_warm_clusters(
+            [jobid for jobid in jobids if states.get(jobid) == "INACTIVE"]
+        )
+
+    def unburst(self):
+        """
+        Release warm MiniClusters, delete the pool and stop watching.
+
+        A subclass that defines unburst should call this too.
+        """
+        if self.warm_pool is not None:
+            self.release_warm_clusters()
+            self.warm_pool.drain()
+            logger.info(f"Drained warm pool: {self.warm_pool.stats()}")
+            self.warm_pool = None
+        self.stop_watchers()
+
+    def delete_minicluster(self, kubectl, name):
+        """
+        Delete a MiniCluster by name.
+        """
+        from kubernetes.client.rest import ApiException
+
+        crd_api = self.get_apis(kubectl)["crd"]
+        try:
+            with self.tracer.span("kubernetes.delete_minicluster", minicluster=name):
+                crd_api.delete_namespaced_custom_object(
+                    group=defaults.minicluster_group,
+                    version=defaults.minicluster_version,
+                    namespace=self.params.namespace,
+                    plural=defaults.minicluster_plural,
+                    name=name,
+                )
+        except ApiException as e:
+            logger.warning(f"Issue deleting MiniCluster {name}: {e}")
+
     def run_jobs(self, kubectl):
         """
         Run jobs (creating MiniClusters), assuming that the burst has been done.
+
+        Each job gets a MiniCluster named by its id, so clusters from earlier
+        runs don't collide, and jobs that are run are removed from self.jobs.
+        """
+        if getattr(self.params, "pack_jobs", False):
+            return self.run_packed_jobs(kubectl)
+
+        # Create a MiniCluster for each job, unless there is a warm one
+        specs = {}
+        for jobid, job in list(self.jobs.items()):
+            self.jobs.pop(jobid)
+            if self.acquire_warm_cluster(job["nnodes"], jobid):
+                continue
+            specs[jobid] = {
+                "command": shlex.join(job["command"]),
+                "nodes": job["nnodes"],
+                "tasks": job["ntasks"],
+                "name": f"{self.params.name}-{jobid}",
+            }
+        self.results = self.create_miniclusters(kubectl, specs)
+        return self.results
+
+    def create_miniclusters(self, kubectl, specs):
+        """
+        Create MiniClusters at the same time, returning a result for each.
+
+        Specs are keyword arguments for create_minicluster, by a key (e.g.,
+        the job id). MiniClusters are submitted without waiting, keeping up to
+        max_creates (parameter) that are not ready yet, and also no more than
+        max_namespace_creates (all ours are in one namespace). The result for
+        each key is the ready handle, or an exception, so one failure does not
+        stop the others. A MiniCluster that is not ready within create_timeout
+        seconds of being submitted gets a TimeoutError (it is not deleted).
+        """
+        max_creates = getattr(self.params, "max_creates", None)
+        max_creates = int(max_creates or defaults.kubernetes_max_creates)
+        max_namespace = getattr(self.params, "max_namespace_creates", None)
+        max_namespace = int(max_namespace or defaults.kubernetes_max_creates)
+        max_inflight = max(1, min(max_creates, max_namespace))
+        timeout = self.get_create_timeout()
+        watcher = self.get_watcher(kubectl)
+
+        results = {}
+        pending = collections.deque(specs.items())
+        inflight = collections.OrderedDict()
+        while pending or inflight:
+            while pending and len(inflight) < max_inflight:
+                key, spec = pending.popleft()
+                try:
+                    inflight[key] = self.create_minicluster(kubectl, wait=False, **spec)
+                except Exception as e:
+                    logger.warning(f"Issue creating MiniCluster for {key}: {e}")
+                    results[key] = e
+            if not inflight:
+                continue
+
+            # Wait on the oldest, up to its timeout, and then stop tracking it
+            key, handle = inflight.popitem(last=False)
+            remaining = max(0, timeout - (time.time() - handle.phases["submitted"]))
+            ready = handle.wait(remaining)
+            watcher.remove(handle.name)
+            if ready:
+                results[key] = handle
+                self.trace_minicluster(handle)
+                self.metrics.timing(
+                    "minicluster_ready",
+                    handle.phases["ready"] - handle.phases["submitted"],
+                    plugin=self.name,
+                )
+                self.metrics.count("miniclusters_ready", plugin=self.name)
+            elif handle.error:
+                results[key] = RuntimeError(handle.error)
+                self.metrics.count("miniclusters_failed", plugin=self.name)
+            else:
+                logger.warning(f"MiniCluster {handle.name} is not ready in {timeout}s")
+                results[key] = TimeoutError(f"MiniCluster {handle.name} timed out")
+                self.metrics.count("miniclusters_failed", plugin=self.name)
+        return results
+
+    def run_packed_jobs(self, kubectl):
         """
-        # Create a MiniCluster for each job
-        for _, job in self.jobs.items():
-            command = " ".join(job["spec"]["tasks"][0]["command"])
-            self.create_minicluster(kubectl, command, job["nnodes"], job["ntasks"])
+        Run jobs packed into shared MiniClusters.
 
-    def create_minicluster(self, kubectl, command, nodes, tasks):
+        Small jobs are grouped (up to pack_size jobs, and pack_max_nodes total
+        nodes) and each group gets one MiniCluster, sized so the jobs can run
+        at the same time, that submits each job. A group that is not full is
+        held back (for later runs) until its oldest job has waited
+        pack_max_wait seconds. Jobs that are run are removed from self.jobs.
+        """
+        pack_size = int(getattr(self.params, "pack_size", None) or defaults.pack_size)
+        max_nodes = getattr(self.params, "pack_max_nodes", None)
+        max_wait = getattr(self.params, "pack_max_wait", None)
+        max_wait = float(defaults.pack_max_wait if max_wait is None else max_wait)
+
+        # Remember when we first saw each job, to know how long it has waited
+        now = time.time()
+        for jobid in self.jobs:
+            self.queued_at.setdefault(jobid, now)
+
+        specs = {}
+        for group, full in self.get_job_groups(pack_size, max_nodes and int(max_nodes)):
+            waited = now - min(self.queued_at[job["id"]] for job in group)
+            if not full and waited < max_wait:
+                logger.info(f"Holding {len(group)} jobs for more to pack with.")
+                continue
+
+            specs[group[0]["id"]] = {
+                "command": get_packed_command(group),
+                "nodes": sum(job["nnodes"] for job in group),
+                "tasks": sum(job["ntasks"] for job in group),
+                "name": f"{self.params.name}-{group[0]['id']}",
+                "launcher": True,
+            }
+            for job in group:
+                self.jobs.pop(job["id"], None)
+                self.queued_at.pop(job["id"], None)
+
+        # Results are by the id of the first job in each group
+        self.results = self.create_miniclusters(kubectl, specs)
+        return self.results
+
+    def has_pending(self):
+        """
+        Jobs held back to pack with others are run in a later cycle, and
+        warm clusters of running jobs are released when the jobs are done.
+        """
+        if any(not isinstance(key, str) for key in self.warm_clusters):
+            return True
+        return bool(getattr(self.params, "pack_jobs", False) and self.jobs)
+
+    def get_job_groups(self, pack_size, max_nodes=None):
+        """
+        Group jobs to pack, smallest first, filling each group in turn.
+
+        We yield each group, and if it is full (could not take another job).
+        The image, flux user and resource limits are set for the plugin, so
+        all jobs here are compatible to share a MiniCluster.
+        """
+        group = []
+        for job in sorted(self.jobs.values(), key=lambda job: job["nnodes"]):
+            nodes = sum(j["nnodes"] for j in group) + job["nnodes"]
+            if group and (len(group) == pack_size or (max_nodes and nodes > max_nodes)):
+                yield group, True
+                group = []
+            group.append(job)
+        if group:
+            yield group, len(group) == pack_size
+
+    def create_minicluster(
+        self, kubectl, command, nodes, tasks, name=None, launcher=False, wait=True
+    ):
         """
         Create the MiniCluster
+
+        The name defaults to the plugin name, and a launcher command is
+        expected to submit its own jobs. We return a handle to watch the
+        MiniCluster come up, and if wait is True, first wait for it to be
+        ready (up to the create_timeout parameter) and stop watching it.
         """
-        logger.info(f"Preparing MiniCluster for {command}")
-
-        # The plugin is assumed to be running from the lead broker
-        # of the cluster it is bursting from, this we get info about it
-        podname = socket.gethostname()
-        hostname = podname.rsplit("-", 1)[0]
-
-        # TODO: we are using defaults for now, but will update this to be likely
-        # configured based on the algorithm that chooses the best spec
-        minicluster, container = helpers.get_minicluster(
-            command,
-            name=self.params.name,
-            memory_limit=self.params.memory_limit,
-            cpu_limit=self.params.cpu_limit,
-            namespace=self.params.namespace,
-            broker_toml=self.params.broker_toml,
-            tasks=tasks,
-            size=nodes,
-            image=self.params.image,
-            wrap=self.params.wrap,
-            log_level=self.params.log_level,
-            flux_user=self.params.flux_user,
-            lead_host=self.params.lead_host,
-            lead_port=self.params.lead_port,
-            munge_secret_name=self.params.munge_secret_name,
-            curve_cert_secret_name=self.params.curve_cert_secret_name,
-            lead_jobname=hostname,
-            lead_size=self.params.lead_size,
-        )
+        from kubernetes.client.rest import ApiException
+
+        name = name or self.params.name
+        logger.info(f"Preparing MiniCluster {name} for {command}")
+
         # Create the namespace
         self.ensure_namespace(kubectl)
 
         # Let's assume there could be bugs applying this differently
-        crd_api = kubernetes_client.CustomObjectsApi(kubectl.api_client)
+        crd_api = self.get_apis(kubectl)["crd"]
 
         # These are not needed if we are doing an isolated burst
         if not self.params.isolated_burst:
             self.ensure_secrets(kubectl)
 
-        # Create the MiniCluster! This also waits for it to be ready
-        print(
-            f"⭐️ Creating the minicluster {self.params.name} in {self.params.namespace}..."
-        )
-
-        # Make sure we provide the core_v1_api we've created
-        operator = FluxMiniCluster(core_v1_api=kubectl)
+        # Create the MiniCluster! The watcher tracks it coming up
+        print(f"⭐️ Creating the minicluster {name} in {self.params.namespace}...")
+        watcher = self.get_watcher(kubectl)
+        handle = watcher.add(name, nodes)
         try:
-            return operator.create(**minicluster, container=container, crd_api=crd_api)
-        except Exception as e:
-            print(f"Issue creating cluster, does it already exist?: {e}")
-            return True
+            with self.tracer.span("kubernetes.create_minicluster", minicluster=name):
+                crd_api.create_namespaced_custom_object(
+                    group=defaults.minicluster_group,
+                    version=defaults.minicluster_version,
+                    namespace=self.params.namespace,
+                    plural=defaults.minicluster_plural,
+                    body=self.get_template().render(
+                        command, nodes, name, tasks=tasks, launcher=launcher
+                    ),
+                )
+        except ApiException as e:
+            if e.status != 409:
+                watcher.remove(name)
+                raise
+            print(f"MiniCluster {name} already exists.")
+        except Exception:
+            watcher.remove(name)
+            raise
+
+        if wait:
+            ready = handle.wait(self.get_create_timeout())
+            watcher.remove(name)
+            if ready:
+                self.trace_minicluster(handle)
+            else:
+                logger.warning(
+                    f"MiniCluster {name} is not ready: {handle.error or 'timeout'}"
+                )
+        return handle
+
+    def trace_minicluster(self, handle):
+        """
+        Add a span for a MiniCluster from submitted to ready.
+
+        This is the time the operator and cluster took to bring it up, and
+        the seconds to reach each phase (e.g., image_pulled) are attributes.
+        """
+        submitted = handle.phases["submitted"]
+        phases = {
+            f"{phase}_seconds": round(seconds - submitted, 3)
+            for phase, seconds in handle.phases.items()
+            if phase != "submitted"
+        }
+        self.tracer.start_span(
+            "kubernetes.minicluster_ready",
+            start=submitted,
+            minicluster=handle.name,
+            **phases,
+        ).end()
+
+    def get_template(self):
+        """
+        Get the template for our MiniClusters, built (and validated) once.
+        """
+        if self.template is None:
+            # The plugin is assumed to be running from the lead broker
+            # of the cluster it is bursting from, this we get info about it
+            hostname = socket.gethostname().rsplit("-", 1)[0]
+            self.template = helpers.MiniClusterTemplate.from_params(
+                self.params, lead_jobname=hostname
+            )
+        return self.template
+
+    def get_watcher(self, kubectl):
+        """
+        Get the watcher for MiniClusters in our namespace, one per kubectl.
+        """
+        key = (id(kubectl), self.params.namespace)
+        with self._watchers_lock:
+            if key not in self.watchers:
+                self.watchers[key] = MiniClusterWatcher(kubectl, self.params.namespace)
+            return self.watchers[key]
+
+    def stop_watchers(self, kubectl=None):
+        """
+        Stop and drop the MiniCluster watchers (for one kubectl, or all).
+        """
+        with self._watchers_lock:
+            for key, watcher in list(self.watchers.items()):
+                if kubectl is None or watcher.kubectl is kubectl:
+                    watcher.stop()
+                    del self.watchers[key]
+
+    def get_create_timeout(self):
+        """
+        Get seconds to wait for a MiniCluster to be ready.
+        """
+        timeout = getattr(self.params, "create_timeout", None)
+        return float(timeout or defaults.kubernetes_create_timeout)
 
     def ensure_secrets(self, kubectl):
         """
         Ensure secrets (munge.key and curve.cert) are ready for a job
+
+        A secret is only created (or patched, if it exists) when its content
+        changed since we last provisioned it to the cluster.
         """
-        secrets = []
+        from kubernetes.client.rest import ApiException
+
+        provisioned = self.get_provisioned(kubectl)["secrets"]
 
         # kubectl create secret --namespace flux-operator munge-key --from-file=/etc/munge/munge.key
+        secrets = []
         if self.params.curve_cert:
             secrets.append(
-                helpers.create_secret(
+                (
                     self.params.curve_cert,
                     "curve.cert",
                     self.params.curve_cert_secret_name,
-                    self.params.namespace,
+                    "r",
                 )
             )
-
         if self.params.munge_key:
             secrets.append(
-                helpers.create_secret(
+                (
                     self.params.munge_key,
                     "munge.key",
                     self.params.munge_secret_name,
-                    self.params.namespace,
-                    mode="rb",
+                    "rb",
                 )
             )
 
-        for secret in secrets:
+        for path, secret_path, name, mode in secrets:
+            digest = self.get_file_hash(path)
+            if provisioned.get(name) == digest:
+                continue
+            secret = helpers.create_secret(
+                path, secret_path, name, self.params.namespace, mode=mode
+            )
             try:
-                logger.debug(f"Creating secret {secret.metadata.name}")
-                kubectl.create_namespaced_secret(
-                    namespace=self.params.namespace,
-                    body=secret,
-                )
+                logger.debug(f"Creating secret {name}")
+                try:
+                    with self.tracer.span("kubernetes.create_secret", secret=name):
+                        kubectl.create_namespaced_secret(
+                            namespace=self.params.namespace,
+                            body=secret,
+                        )
+                except ApiException as e:
+                    if e.status != 409:
+                        raise
+                    logger.debug(f"Secret {name} exists, patching")
+                    with self.tracer.span("kubernetes.patch_secret", secret=name):
+                        kubectl.patch_namespaced_secret(
+                            name=name, namespace=self.params.namespace, body=secret
+                        )
+                provisioned[name] = digest
             except ApiException as e:
                 print(
                     "Exception when calling CoreV1Api->create_namespaced_config_map: %s\n"
                     % e
                 )
+
+    def get_file_hash(self, path):
+        """
+        Get the content hash of a file, only reading it again if it changed.
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in self.file_hashes:
+            self.file_hashes[key] = utils.get_file_hash(path)
+        return self.file_hashes[key]
+
+
+def get_packed_command(jobs):
+    """
+    Get a launcher command that submits each job, and waits for all of them.
+    """
+    commands = []
+    for job in jobs:
+        command = shlex.join(job["command"])
+        commands.append(f"flux submit -N {job['nnodes']} -n {job['ntasks']} {command}")
+    commands.append("flux queue drain")
+    return " && ".join(commands)
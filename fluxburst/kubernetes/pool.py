@@ -0,0 +1,173 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import threading
+import time
+
+from fluxburst.logger import logger
+
+
+class WarmPool:
+    """
+    A pool of idle MiniClusters, created ahead of time and ready for work.
+
+    Clusters are kept in buckets by size (nodes). The create function is
+    given a size and returns the name of a new (ready) MiniCluster, and the
+    delete function is given a name. Each bucket is refilled (in the
+    background) to min_size idle clusters, never holding more than
+    max_size, and idle clusters over min_size are deleted after ttl seconds.
+    A cluster that is acquired is leased until it is released (back to the
+    pool, or deleted if the pool is full) or the pool is drained. A drained
+    pool is closed, and does not create (or keep) clusters after.
+    """
+
+    def __init__(self, create, delete, sizes, min_size=1, max_size=None, ttl=None):
+        self.create = create
+        self.delete = delete
+        self.min_size = min_size
+        self.max_size = max_size if max_size is not None else min_size
+        self.ttl = ttl
+
+        # Idle clusters in each bucket are (name, idle since), and the
+        # number being created for each bucket
+        self.buckets = {int(size): [] for size in sizes}
+        self.creating = {size: 0 for size in self.buckets}
+        self.leased = {}
+        self.hits = 0
+        self.misses = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._refill = None
+
+    @property
+    def sizes(self):
+        return sorted(self.buckets)
+
+    def acquire(self, nodes):
+        """
+        Take the smallest idle cluster with at least nodes.
+
+        Returns the name of the cluster, or None if there isn't one. Either
+        way, the pool is refilled in the background.
+        """
+        name = None
+        with self._lock:
+            for size in self.sizes:
+                if size >= nodes and self.buckets[size]:
+                    name, _ = self.buckets[size].pop(0)
+                    self.leased[name] = size
+                    break
+            if name:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self.refill()
+        return name
+
+    def refill(self, wait=False):
+        """
+        Fill the pool in a background thread, if one isn't running.
+        """
+        if self.closed:
+            return
+        if self._refill is None or not self._refill.is_alive():
+            self._refill = threading.Thread(target=self.fill, daemon=True)
+            self._refill.start()
+        if wait:
+            self._refill.join()
+
+    def fill(self):
+        """
+        Create clusters until each bucket has min_size idle.
+        """
+        self.expire()
+        for size in self.sizes:
+            while True:
+                with self._lock:
+                    count = len(self.buckets[size]) + self.creating[size]
+                    if self.closed or count >= min(self.min_size, self.max_size):
+                        break
+                    self.creating[size] += 1
+                try:
+                    name = self.create(size)
+                except Exception as e:
+                    logger.warning(
+                        f"Issue creating warm MiniCluster of size {size}: {e}"
+                    )
+                    name = None
+                with self._lock:
+                    self.creating[size] -= 1
+                    closed = self.closed
+                    if name and not closed:
+                        self.buckets[size].append((name, time.time()))
+                if not name:
+                    break
+
+                # The pool was drained while we were creating it
+                if closed:
+                    self.delete(name)
+                    break
+
+    def release(self, name, nodes=None):
+        """
+        Return a leased cluster to the pool, or delete it if the bucket is full.
+
+        The size of a leased cluster is known, otherwise nodes is used.
+        """
+        with self._lock:
+            size = self.leased.pop(name, nodes)
+            bucket = self.buckets.get(size)
+            if not self.closed and bucket is not None and len(bucket) < self.max_size:
+                bucket.append((name, time.time()))
+                return
+        self.delete(name)
+        self.expire()
+
+    def expire(self):
+        """
+        Delete idle clusters over min_size that have been idle for ttl.
+        """
+        if self.ttl is None:
+            return
+        expired = []
+        now = time.time()
+        with self._lock:
+            for size, bucket in self.buckets.items():
+                while len(bucket) > self.min_size and now - bucket[0][1] > self.ttl:
+                    expired.append(bucket.pop(0)[0])
+        for name in expired:
+            self.delete(name)
+
+    def drain(self):
+        """
+        Close the pool and delete all idle and leased clusters.
+
+        A refill that is running is waited for, and anything it creates
+        after we close is deleted.
+        """
+        with self._lock:
+            self.closed = True
+        if self._refill is not None and self._refill is not threading.current_thread():
+            self._refill.join()
+        with self._lock:
+            names = [name for bucket in self.buckets.values() for name, _ in bucket]
+            names += list(self.leased)
+            for bucket in self.buckets.values():
+                bucket.clear()
+            self.leased = {}
+        for name in names:
+            self.delete(name)
+
+    def stats(self):
+        """
+        Counts of hits, misses, and idle clusters in each bucket.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "idle": {size: len(bucket) for size, bucket in self.buckets.items()},
+                "leased": len(self.leased),
+            }
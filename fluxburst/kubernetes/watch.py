@@ -0,0 +1,211 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import threading
+import time
+
+from fluxburst.logger import logger
+
+# Phases of a MiniCluster coming up, in order
+phases = ["submitted", "scheduled", "image_pulled", "broker_up", "ready"]
+
+
+class MiniClusterHandle:
+    """
+    A handle to a MiniCluster that was submitted, but might not be ready.
+
+    Phases holds the time that each phase was reached: submitted (the CRD
+    was created), scheduled (all pods are scheduled), image_pulled (all pods
+    have the image), broker_up (the lead broker pod is ready) and ready (all
+    pods are ready). A pod that succeeded (e.g., a short job command) ran,
+    so it counts as ready, and the MiniCluster is done (and ready) when the
+    lead broker pod succeeded.
+    """
+
+    def __init__(self, name, namespace, size):
+        self.name = name
+        self.namespace = namespace
+        self.size = size
+        self.phases = {"submitted": time.time()}
+        self.pods = {}
+        self.error = None
+        self._ready = threading.Event()
+
+    def ready(self):
+        """
+        Determine if the MiniCluster is ready, without waiting.
+        """
+        return self._ready.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the MiniCluster to be ready (or fail), up to timeout seconds.
+
+        Returns True if it is ready.
+        """
+        self._ready.wait(timeout)
+        return self.ready() and self.error is None
+
+    def update(self, pod):
+        """
+        Update phases from a pod of the MiniCluster.
+        """
+        reached = set()
+        conditions = {c.type: c.status for c in pod.status.conditions or []}
+        if conditions.get("PodScheduled") == "True":
+            reached.add("scheduled")
+        statuses = pod.status.container_statuses or []
+        if statuses and all(status.image_id for status in statuses):
+            reached.add("image_pulled")
+        if conditions.get("Ready") == "True":
+            reached.add("ready")
+            if is_lead_broker(pod, self.name):
+                self.set_phase("broker_up")
+        if pod.status.phase == "Succeeded":
+            reached.update(["scheduled", "image_pulled", "ready"])
+        self.pods[pod.metadata.name] = reached
+
+        if pod.status.phase == "Failed":
+            self.error = f"Pod {pod.metadata.name} failed"
+            self._ready.set()
+        elif pod.status.phase == "Succeeded" and is_lead_broker(pod, self.name):
+            for phase in phases[1:]:
+                self.set_phase(phase)
+
+        # A phase is reached for the MiniCluster when all pods have it
+        for phase in ["scheduled", "image_pulled", "ready"]:
+            count = sum(1 for found in self.pods.values() if phase in found)
+            if count >= self.size:
+                self.set_phase(phase)
+        if "ready" in self.phases:
+            self._ready.set()
+
+    def set_phase(self, phase):
+        """
+        Record the first time we see a phase.
+        """
+        if phase not in self.phases:
+            logger.debug(f"MiniCluster {self.name} reached {phase}")
+            self.phases[phase] = time.time()
+
+    def __str__(self):
+        return f"[minicluster-handle:{self.namespace}/{self.name}]"
+
+    def __repr__(self):
+        return str(self)
+
+
+def is_lead_broker(pod, name):
+    """
+    The lead broker is the pod with index 0 of the MiniCluster job.
+    """
+    annotations = pod.metadata.annotations or {}
+    index = annotations.get("batch.kubernetes.io/job-completion-index")
+    if index is not None:
+        return index == "0"
+    return pod.metadata.name.startswith(f"{name}-0-")
+
+
+class MiniClusterWatcher:
+    """
+    Watch pods in a namespace and update the handles for many MiniClusters.
+
+    One watcher (and one thread and connection) is used for all MiniClusters
+    in the namespace. Pods are matched to a MiniCluster by the job-name label.
+    The thread only runs while there are MiniClusters to track, and is
+    started again when one is added.
+    """
+
+    def __init__(self, kubectl, namespace):
+        self.kubectl = kubectl
+        self.namespace = namespace
+        self.handles = {}
+        self._watch = None
+        self._thread = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def add(self, name, size):
+        """
+        Start tracking a MiniCluster that was just submitted, returning its handle.
+        """
+        handle = MiniClusterHandle(name, self.namespace, size)
+        with self._lock:
+            self.handles[name] = handle
+        self.start()
+        return handle
+
+    def remove(self, name):
+        """
+        Stop tracking a MiniCluster (e.g., it is ready, failed or timed out).
+        """
+        with self._lock:
+            self.handles.pop(name, None)
+            idle = not self.handles
+        if idle and self._watch is not None:
+            self._watch.stop()
+
+    def pending(self):
+        """
+        Count MiniClusters we are tracking that are not ready yet.
+        """
+        with self._lock:
+            return sum(1 for handle in self.handles.values() if not handle.ready())
+
+    def start(self):
+        """
+        Start the watch thread, if it isn't running.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop watching.
+        """
+        self._stopped = True
+        if self._watch is not None:
+            self._watch.stop()
+
+    def run(self):
+        """
+        Watch pods until stopped (or nothing is tracked), starting the watch
+        again if it ends.
+        """
+        from kubernetes import watch as kubernetes_watch
+
+        while True:
+            with self._lock:
+                if self._stopped or not self.handles:
+                    self._thread = None
+                    return
+            self._watch = kubernetes_watch.Watch()
+            try:
+                for event in self._watch.stream(
+                    self.kubectl.list_namespaced_pod,
+                    namespace=self.namespace,
+                    label_selector="job-name",
+                    timeout_seconds=60,
+                ):
+                    self.update(event["object"])
+                    if self._stopped or not self.handles:
+                        self._watch.stop()
+            except Exception as e:
+                logger.warning(f"Issue watching pods in {self.namespace}: {e}")
+                time.sleep(1)
+
+    def update(self, pod):
+        """
+        Give a pod to the handle of its MiniCluster.
+        """
+        name = (pod.metadata.labels or {}).get("job-name")
+        with self._lock:
+            handle = self.handles.get(name)
+        if handle is not None:
+            handle.update(pod)
@@ -0,0 +1,175 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import collections
+import contextlib
+import os
+import threading
+import time
+
+import fluxburst.utils as utils
+
+
+class MetricsSink:
+    """
+    A sink for timers (seconds) and counters from a burst cycle.
+
+    A metric has a name and optional labels (e.g., plugin="gke"). A sink
+    implements timing and count, and flush is called at the end of a cycle.
+    """
+
+    enabled = True
+
+    def timing(self, name, seconds, **labels):
+        raise NotImplementedError
+
+    def count(self, name, value=1, **labels):
+        raise NotImplementedError
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """
+        Time a block of code, e.g., with metrics.timer("select"):
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(name, time.perf_counter() - start, **labels)
+
+    def flush(self):
+        pass
+
+
+class NullSink(MetricsSink):
+    """
+    The default sink does nothing, so metrics cost (almost) nothing.
+    """
+
+    enabled = False
+
+    def __init__(self):
+        self._timer = contextlib.nullcontext()
+
+    def timing(self, name, seconds, **labels):
+        pass
+
+    def count(self, name, value=1, **labels):
+        pass
+
+    def timer(self, name, **labels):
+        return self._timer
+
+
+class InMemorySink(MetricsSink):
+    """
+    Keep all timings and counters in memory, e.g., for tests.
+
+    Metrics are keyed by name and a tuple of sorted label items.
+    """
+
+    def __init__(self):
+        self.timings = collections.defaultdict(list)
+        self.counters = collections.Counter()
+        self._lock = threading.Lock()
+
+    def timing(self, name, seconds, **labels):
+        with self._lock:
+            self.timings[(name, tuple(sorted(labels.items())))].append(seconds)
+
+    def count(self, name, value=1, **labels):
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def get_count(self, name, **labels):
+        """
+        Get a counter, summed over labels that are not given.
+        """
+        return sum(
+            value
+            for (key, items), value in self.counters.items()
+            if key == name and set(labels.items()).issubset(items)
+        )
+
+    def get_timings(self, name, **labels):
+        """
+        Get all timings for a metric, for labels that are given.
+        """
+        return [
+            seconds
+            for (key, items), values in self.timings.items()
+            if key == name and set(labels.items()).issubset(items)
+            for seconds in values
+        ]
+
+
+class PrometheusSink(MetricsSink):
+    """
+    Write metrics to a Prometheus text file, e.g., for the node exporter.
+
+    Timers are summaries (the sum and count of seconds) and counters are
+    totals. The file is written on flush, and replaced at once so a
+    collector never reads it half written.
+    """
+
+    def __init__(self, filename, prefix="fluxburst"):
+        self.filename = os.path.abspath(filename)
+        self.prefix = prefix
+        self.sums = collections.Counter()
+        self.counts = collections.Counter()
+        self.counters = collections.Counter()
+        self._lock = threading.Lock()
+
+    def timing(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.sums[key] += seconds
+            self.counts[key] += 1
+
+    def count(self, name, value=1, **labels):
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def render(self):
+        """
+        Render metrics in the Prometheus text format.
+        """
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self.sums}):
+                metric = f"{self.prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} summary")
+                for key in sorted(k for k in self.sums if k[0] == name):
+                    labels = format_labels(key[1])
+                    lines.append(f"{metric}_sum{labels} {self.sums[key]}")
+                    lines.append(f"{metric}_count{labels} {self.counts[key]}")
+            for name in sorted({name for name, _ in self.counters}):
+                metric = f"{self.prefix}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for key in sorted(k for k in self.counters if k[0] == name):
+                    lines.append(
+                        f"{metric}{format_labels(key[1])} {self.counters[key]}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        utils.replace_file(self.render(), self.filename)
+
+
+def format_labels(items):
+    """
+    Format label items as {key="value",...} (or nothing, if there are none).
+    """
+    if not items:
+        return ""
+    labels = ",".join(
+        '%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in items
+    )
+    return "{%s}" % labels
+
+
+# The default sink, shared by clients and plugins that don't set one
+null = NullSink()
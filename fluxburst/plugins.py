@@ -3,21 +3,89 @@
 #
 # SPDX-License-Identifier: (MIT)
 
+import collections.abc
 import importlib
 import os
 import pkgutil
 from dataclasses import dataclass
 
 import fluxburst.defaults as defaults
+import fluxburst.metrics as metrics
+import fluxburst.tracing as tracing
 from fluxburst.logger import logger
 
-# Executor plugins are externally installed plugins named "snakemake_executor_<name>"
-# They should follow the same convention if on pip, snakemake-executor-<name>
-burstable_plugins = {
-    name.replace(defaults.plugin_prefix, ""): importlib.import_module(name)
-    for _, name, _ in pkgutil.iter_modules()
-    if name.startswith(defaults.plugin_prefix)
-}
+
+class PluginRegistry(collections.abc.Mapping):
+    """
+    A lazy lookup of burstable plugin modules, by name.
+
+    Plugins register a module under the "fluxburst.plugins" entry point group,
+    e.g., gke = fluxburst_gke. Installed modules named fluxburst_<name> are
+    also found (without importing them). The names are discovered once and
+    cached, and a plugin module is only imported when it is asked for.
+    """
+
+    def __init__(self, group=None, prefix=None):
+        self.group = group or defaults.plugin_group
+        self.prefix = prefix or defaults.plugin_prefix
+        self._found = None
+        self._modules = {}
+
+    @property
+    def found(self):
+        """
+        Discover plugins, by name, the first time we need them.
+        """
+        if self._found is None:
+            self._found = {
+                name.replace(self.prefix, "", 1): name
+                for _, name, _ in pkgutil.iter_modules()
+                if name.startswith(self.prefix)
+            }
+            # Entry points take precedence over module names
+            for entrypoint in get_entry_points(self.group):
+                self._found[entrypoint.name] = entrypoint
+        return self._found
+
+    def refresh(self):
+        """
+        Forget discovered plugins, e.g., after installing a new one.
+        """
+        self._found = None
+        self._modules = {}
+
+    def __getitem__(self, name):
+        if name not in self._modules:
+            found = self.found[name]
+            if isinstance(found, str):
+                self._modules[name] = importlib.import_module(found)
+            else:
+                self._modules[name] = found.load()
+        return self._modules[name]
+
+    def __contains__(self, name):
+        return name in self.found
+
+    def __iter__(self):
+        return iter(self.found)
+
+    def __len__(self):
+        return len(self.found)
+
+
+def get_entry_points(group):
+    """
+    Get entry points for a group, with the older API for Python < 3.10
+    """
+    import importlib.metadata
+
+    entrypoints = importlib.metadata.entry_points()
+    if hasattr(entrypoints, "select"):
+        return entrypoints.select(group=group)
+    return entrypoints.get(group, [])
+
+
+burstable_plugins = PluginRegistry()
 
 
 @dataclass
@@ -33,6 +101,15 @@ class BurstPlugin:
     # Default dataclass is essentially empty
     _param_dataclass = BurstParameters
 
+    # Timers and counters, set by the client (see FluxBurst.set_metrics)
+    metrics = metrics.null
+
+    # The Flux handle of the client (e.g., to check job states), set on load
+    flux = None
+
+    # Spans for the burst cycle, set by the client (see FluxBurst.set_tracer)
+    tracer = tracing.null
+
     def __init__(self, dataclass, **kwargs):
         self.set_params(dataclass)
 
@@ -43,6 +120,9 @@ class BurstPlugin:
     def schedule(self, job):
         """
         Attempt to schedule a job, if possible.
+
+        The job is a BurstJob (see fluxburst.job) with the id, nnodes, ntasks,
+        ncores, command and attributes, also accessible by key.
         """
         raise NotImplementedError
 
@@ -52,6 +132,27 @@ class BurstPlugin:
         """
         raise NotImplementedError
 
+    def has_pending(self):
+        """
+        Determine if the plugin holds jobs from an earlier run (e.g., to pack).
+
+        If so, the client runs the plugin each cycle, even without new jobs.
+        """
+        return False
+
+    def capacity(self):
+        """
+        Declare the capacity of the plugin for assigning jobs.
+
+        This returns a dictionary with max_nodes, cores_per_node and
+        cost_per_node, taken from the parameters if they are defined.
+        A value that is None is not known (and not a limit).
+        """
+        return {
+            key: getattr(self.params, key, None)
+            for key in ["max_nodes", "cores_per_node", "cost_per_node"]
+        }
+
     def cleanup(self, name=None):
         pass
 
@@ -3,6 +3,22 @@
 #
 # SPDX-License-Identifier: (MIT)
 
+import fluxburst.defaults as defaults
+
+pending_state_ids = {defaults.job_states[state] for state in defaults.pending_states}
+
+
+def is_pending(job):
+    """
+    Prefilter a job from the job listing if:
+
+    1. It has not started running yet
+
+    A prefilter only sees the fields from the job listing (state, nnodes,
+    ntasks, queue, urgency, etc.) and not the jobspec, so it should be cheap.
+    """
+    return job["state"] in pending_state_ids
+
 
 def is_burstable(jobinfo):
     """
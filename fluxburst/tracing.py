@@ -0,0 +1,270 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import collections
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+
+import fluxburst.utils as utils
+
+# The span we are in. Threads start without one, so the client runs
+# plugins in threads with a copy of the context (see FluxBurst.run_plugins)
+current_span = contextvars.ContextVar("fluxburst_span", default=None)
+
+
+class Span:
+    """
+    A named and timed piece of work, with a parent span (or None).
+
+    Times are seconds since the epoch, and attributes are key value pairs
+    (e.g., plugin="gke" or jobid=1234). A span is exported when it ends.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, tracer, name, parent=None, start=None, **attributes):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.id = next(self._ids)
+        self.attributes = attributes
+        self.start = start or time.time()
+        self.end_time = None
+        self.thread = threading.get_ident()
+
+    @property
+    def duration(self):
+        if self.end_time is None:
+            return
+        return self.end_time - self.start
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        """
+        End the span (only once) and give it to the tracer to export.
+        """
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        self.tracer.export(self)
+
+    def __str__(self):
+        return f"[span:{self.name}]"
+
+    def __repr__(self):
+        return str(self)
+
+
+class Tracer:
+    """
+    A tracer makes spans for a burst cycle and exports them.
+
+    Use span as a context manager for work done in a block (spans made
+    inside are its children) or start_span for work that ends somewhere
+    else (e.g., an RPC that is sent now, and received later) and end it.
+    A tracer implements export, and flush is called at the end of a cycle.
+    """
+
+    enabled = True
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        span = self.start_span(name, **attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_attribute("error", str(e))
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+    def start_span(self, name, start=None, **attributes):
+        """
+        Start a span that is a child of the current span, and not current itself.
+        """
+        return Span(self, name, current_span.get(), start=start, **attributes)
+
+    def export(self, span):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+
+class NullSpan:
+    """
+    A span that does nothing, for the NullTracer.
+    """
+
+    def set_attribute(self, key, value):
+        pass
+
+    def end(self):
+        pass
+
+
+class NullTracer(Tracer):
+    """
+    The default tracer does nothing, so tracing costs (almost) nothing.
+    """
+
+    enabled = False
+
+    def __init__(self):
+        self._span = NullSpan()
+        self._context = contextlib.nullcontext(self._span)
+
+    def span(self, name, **attributes):
+        return self._context
+
+    def start_span(self, name, start=None, **attributes):
+        return self._span
+
+    def export(self, span):
+        pass
+
+
+class InMemoryTracer(Tracer):
+    """
+    Keep all ended spans in memory, e.g., for tests.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def get_spans(self, name):
+        """
+        Get ended spans with a name, in the order they ended.
+        """
+        return [span for span in self.spans if span.name == name]
+
+
+class FileTracer(Tracer):
+    """
+    Write spans to a file in the Chrome trace event format.
+
+    The file can be opened in a trace viewer (e.g., Perfetto or
+    chrome://tracing) to see the critical path of a burst. It is written on
+    flush with all spans so far (up to max_spans, dropping the oldest), and
+    replaced at once so a viewer never reads it half written.
+    """
+
+    def __init__(self, filename, max_spans=100000):
+        self.filename = os.path.abspath(filename)
+        self.events = collections.deque(maxlen=max_spans)
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        args = dict(span.attributes)
+        if span.parent is not None:
+            args["parent"] = span.parent.name
+        event = {
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": span.start * 1e6,
+            "dur": span.duration * 1e6,
+            "pid": self.pid,
+            "tid": span.thread,
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def render(self):
+        """
+        Render spans as a Chrome trace (json).
+        """
+        with self._lock:
+            events = list(self.events)
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+
+    def flush(self):
+        utils.replace_file(self.render(), self.filename)
+
+
+class OtlpTracer(Tracer):
+    """
+    Export spans with OpenTelemetry to an OTLP (http) collector.
+
+    This requires opentelemetry-sdk and opentelemetry-exporter-otlp-proto-http.
+    The endpoint defaults to the OTEL_EXPORTER_OTLP_* environment variables.
+    Spans are batched, and sent in the background and on flush.
+    """
+
+    def __init__(self, endpoint=None, service_name="fluxburst"):
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        self.provider = TracerProvider(
+            resource=Resource.create({"service.name": service_name})
+        )
+        self.provider.add_span_processor(
+            BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint))
+        )
+        self.tracer = self.provider.get_tracer("fluxburst")
+
+    @contextlib.contextmanager
+    def span(self, name, **attributes):
+        with self.tracer.start_as_current_span(
+            name, attributes=get_otel_attributes(attributes)
+        ) as span:
+            yield span
+
+    def start_span(self, name, start=None, **attributes):
+        return self.tracer.start_span(
+            name,
+            attributes=get_otel_attributes(attributes),
+            start_time=start and int(start * 1e9),
+        )
+
+    def flush(self):
+        self.provider.force_flush()
+
+
+def get_otel_attributes(attributes):
+    """
+    OpenTelemetry attributes are strings, numbers or booleans.
+    """
+    return {
+        key: value if isinstance(value, (str, bool, int, float)) else str(value)
+        for key, value in attributes.items()
+        if value is not None
+    }
+
+
+def get_tracer(uri):
+    """
+    Get a tracer from a uri, e.g., in a config.
+
+    A uri starting with http(s):// is an OTLP endpoint, and anything else
+    is a file for a Chrome trace.
+    """
+    if uri.startswith(("http://", "https://")):
+        return OtlpTracer(endpoint=uri)
+    return FileTracer(uri)
+
+
+# The default tracer, shared by clients and plugins that don't set one
+null = NullTracer()
@@ -0,0 +1,167 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import fluxburst.defaults as defaults
+from fluxburst.job import BurstJob
+from fluxburst.logger import logger
+
+# The state a job is in after each job-manager journal event
+event_states = {
+    "submit": "NEW",
+    "validate": "DEPEND",
+    "depend": "PRIORITY",
+    "priority": "SCHED",
+    "alloc": "RUN",
+    "finish": "CLEANUP",
+    "clean": "INACTIVE",
+    "invalidate": "INACTIVE",
+}
+
+
+class QueueTracker:
+    """
+    A live index of pending jobs, updated from the job-manager journal.
+
+    Instead of listing the queue and looking up every job each cycle,
+    we consume the journal and only get the listing of jobs that are new.
+    As with select_jobs, the prefilter sees the listing, and only jobs that
+    pass have their jobspec retrieved for the selector. Jobs are dropped
+    from the index as soon as they start running (or are otherwise done)
+    and the selector result for each job is cached.
+    """
+
+    def __init__(self, flux, max_inflight=None):
+        self.flux = flux
+        self.max_inflight = max_inflight or defaults.max_inflight_rpcs
+
+        # Pending jobs (the listing) by id, and the ids we still need it for
+        self.jobs = {}
+        self.unresolved = set()
+
+        # Cached selector result for each job, a compact record (BurstJob)
+        # of those that are burstable, and the selector used
+        self.burstable = {}
+        self.selected = {}
+        self._selector = None
+
+    def update(self, timeout=0.0, deadline=None):
+        """
+        Apply new journal events to the index.
+
+        Events are applied until none arrive within timeout seconds, or the
+        deadline (a time.time()) is reached, so a busy queue can't keep us
+        here. Returns the number of events that were applied.
+        """
+        count = 0
+        for event in self.flux.journal_events(timeout=timeout, deadline=deadline):
+            self.apply(event)
+            count += 1
+        if count:
+            logger.debug(f"Applied {count} journal events, {len(self.jobs)} pending")
+        return count
+
+    def apply(self, event):
+        """
+        Apply a single journal event to the index.
+        """
+        jobid = event["id"]
+        name = event["name"]
+        context = event.get("context") or {}
+
+        # Severity 0 exceptions are fatal, and the job will not run
+        if name == "exception" and context.get("severity") == 0:
+            return self.remove(jobid)
+
+        state = event_states.get(name)
+        if name == "submit":
+            self.jobs[jobid] = {"id": jobid, "t_submit": event.get("timestamp")}
+            self.unresolved.add(jobid)
+
+        # We only index jobs we saw submitted (the journal replays history)
+        if jobid not in self.jobs:
+            return
+
+        job = self.jobs[jobid]
+        if name == "urgency" and "urgency" in context:
+            job["urgency"] = context["urgency"]
+        if state is None:
+            return
+        if state not in defaults.pending_states:
+            return self.remove(jobid)
+        job["state"] = defaults.job_states[state]
+
+    def remove(self, jobid):
+        """
+        Remove a job that is no longer pending.
+        """
+        self.jobs.pop(jobid, None)
+        self.burstable.pop(jobid, None)
+        self.selected.pop(jobid, None)
+        self.unresolved.discard(jobid)
+
+    def mark_as_scheduled(self, jobid):
+        """
+        A job that is scheduled to a plugin should not be selected again.
+        """
+        self.burstable[jobid] = False
+        self.selected.pop(jobid, None)
+
+    def resolve(self):
+        """
+        Get the listing (without the jobspec) for jobs we have not seen before.
+        """
+        if not self.unresolved:
+            return
+        listings = self.flux.get_job_listings(
+            list(self.unresolved), max_inflight=self.max_inflight
+        )
+        for jobid in list(self.unresolved):
+            listing = listings.get(jobid)
+            if listing is None:
+                self.remove(jobid)
+                continue
+            self.jobs[jobid] = self.merge(self.jobs[jobid], listing)
+        self.unresolved = set()
+
+    def merge(self, job, info):
+        """
+        Update a listing or job info with the journal, which is more current.
+        """
+        info["id"] = job["id"]
+        info["state"] = job.get("state", info.get("state"))
+        if "urgency" in job:
+            info["urgency"] = job["urgency"]
+        return info
+
+    def select(self, prefilter, selector):
+        """
+        Select burstable jobs (as a BurstJob) from the index, keyed by job id.
+
+        Jobs that pass the prefilter, and that we have not run the selector
+        for, have their job info (and jobspec) retrieved for it.
+        """
+        # A different selector means cached results are no longer valid
+        if selector is not self._selector:
+            self.burstable = {}
+            self.selected = {}
+            self._selector = selector
+
+        self.resolve()
+        passed = [jobid for jobid, job in self.jobs.items() if prefilter(job)]
+        unseen = [jobid for jobid in passed if jobid not in self.burstable]
+        if unseen:
+            infos = self.flux.get_job_infos(unseen, max_inflight=self.max_inflight)
+            for jobid in unseen:
+                info = infos.get(jobid)
+                if info is None:
+                    self.remove(jobid)
+                    continue
+                info = self.merge(self.jobs[jobid], info)
+                self.burstable[jobid] = bool(selector(info))
+                if self.burstable[jobid]:
+                    self.selected[jobid] = BurstJob.from_info(info)
+        return {
+            jobid: self.selected[jobid] for jobid in passed if self.burstable.get(jobid)
+        }
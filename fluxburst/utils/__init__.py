@@ -13,6 +13,8 @@ from .fileio import (
     read_yaml,
     recursive_find,
     remove_to_base,
+    replace_file,
+    replace_json,
     workdir,
     write_file,
     write_json,
@@ -13,8 +13,6 @@ import stat
 import tempfile
 from contextlib import contextmanager
 
-import yaml
-
 from fluxburst.logger import logger
 
 
@@ -207,6 +205,33 @@ def write_json(json_obj, filename, cls=None, mode="w"):
     return filename
 
 
+def replace_file(content, filename, mode="w"):
+    """
+    Write content to a temporary file and replace filename with it at once.
+
+    A reader (e.g., another thread) never sees the file half written. The
+    file is readable by others (0644, not the 0600 of a temporary file) so
+    e.g., a node exporter running as another user can read metrics.
+    """
+    fd, tmpfile = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        with os.fdopen(fd, mode) as filey:
+            filey.write(content)
+        os.chmod(tmpfile, 0o644)
+        os.replace(tmpfile, filename)
+    except BaseException:
+        os.remove(tmpfile)
+        raise
+    return filename
+
+
+def replace_json(json_obj, filename, cls=None):
+    """
+    Write json to a filename, replacing it at once (see replace_file)
+    """
+    return replace_file(print_json(json_obj, cls=cls), filename)
+
+
 def print_json(json_obj, cls=None):
     """
     Print json pretty
@@ -218,6 +243,8 @@ def write_yaml(obj, filename):
     """
     Save yaml to file, also preserving comments.
     """
+    import yaml
+
     with open(filename, "w") as fd:
         yaml.dump(obj, fd)
 
@@ -226,6 +253,8 @@ def read_yaml(filename):
     """
     Load a yaml from file, roundtrip to preserve comments
     """
+    import yaml
+
     with open(filename, "r") as fd:
         content = yaml.safe_load(fd)
     return content
@@ -3,7 +3,7 @@
 #
 # SPDX-License-Identifier: (MIT)
 
-__version__ = "0.0.15"
+__version__ = "0.0.16"
 AUTHOR = "Vanessa Sochat"
 EMAIL = "vsoch@users.noreply.github.com"
 NAME = "flux-burst"
@@ -19,10 +19,14 @@ INSTALL_REQUIRES = (("pyyaml", {"min_version": None}),)
 
 INSTALL_REQUIRES_KUBERNETES = (
     ("kubernetes", {"min_version": None}),
-    ("fluxoperator", {"min_version": None}),
     ("requests", {"min_version": None}),
 )
 
+INSTALL_REQUIRES_TRACING = (
+    ("opentelemetry-sdk", {"min_version": None}),
+    ("opentelemetry-exporter-otlp-proto-http", {"min_version": None}),
+)
+
 TESTS_REQUIRES = (("pytest", {"min_version": "4.6.2"}),)
 
 ################################################################################
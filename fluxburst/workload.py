@@ -0,0 +1,267 @@
+# Copyright 2023 Lawrence Livermore National Security, LLC and other
+# HPCIC DevTools Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (MIT)
+
+import bisect
+import heapq
+import itertools
+import math
+import random
+
+import fluxburst.defaults as defaults
+import fluxburst.utils as utils
+
+# The job-manager journal event that moves a job to each state
+state_events = {
+    "NEW": "submit",
+    "DEPEND": "validate",
+    "PRIORITY": "depend",
+    "SCHED": "priority",
+    "RUN": "alloc",
+    "CLEANUP": "finish",
+    "INACTIVE": "clean",
+}
+
+# Nodes requested by jobs, and how likely each is (most jobs are small)
+node_weights = {1: 40, 2: 25, 4: 15, 8: 10, 16: 5, 32: 3, 64: 2}
+
+
+class Workload:
+    """
+    A synthetic queue of jobs for the mock Flux handle.
+
+    Each job has the fields from the job listing, if it is burstable, and
+    the transitions between states, as [seconds, state] from the start of
+    the workload (jobs submitted before the start have negative times). A
+    pending burstable job does not run until it is scheduled by a burst.
+    """
+
+    def __init__(self, jobs, burst_delay=10):
+        self.jobs = {job["id"]: job for job in jobs}
+        self.burst_delay = burst_delay
+        self.times = {
+            jobid: [t for t, _ in job["transitions"]]
+            for jobid, job in self.jobs.items()
+        }
+        self._events = None
+        self._count = itertools.count()
+
+    @classmethod
+    def generate(
+        cls,
+        count=100,
+        seed=None,
+        burstable=0.1,
+        pending=0.8,
+        backlog=1.0,
+        arrival_rate=1.0,
+        cores_per_node=4,
+        mean_wait=60,
+        mean_runtime=600,
+        users=10,
+        burst_delay=10,
+    ):
+        """
+        Generate a workload of count jobs, the same for the same seed.
+
+        A fraction (backlog) of jobs are already submitted at the start, and
+        of those, a fraction (pending) have not started yet. The rest arrive
+        after the start (arrival_rate jobs per second). Nodes follow
+        node_weights, tasks are one per node or one per core, pending jobs
+        start after an exponential wait (mean_wait) and runtimes are
+        log-normal (mean_runtime). A fraction of jobs (burstable) are
+        flagged for bursting.
+        """
+        rng = random.Random(seed)
+        sizes, weights = zip(*node_weights.items())
+
+        # Log-normal runtime with the mean we want
+        sigma = 1.0
+        mu = math.log(mean_runtime) - sigma**2 / 2
+
+        jobs = []
+        submitted = count * backlog
+        arrival = 0
+        for i in range(count):
+            if i < submitted:
+                t_submit = -rng.uniform(0, mean_wait + mean_runtime)
+                is_pending = rng.random() < pending
+            else:
+                arrival += rng.expovariate(arrival_rate)
+                t_submit = arrival
+                is_pending = True
+
+            nnodes = rng.choices(sizes, weights)[0]
+            job = {
+                "id": (i + 1) << 24,
+                "userid": 1000 + rng.randrange(users),
+                "urgency": 16,
+                "priority": 16,
+                "t_submit": t_submit,
+                "name": f"job-{i}",
+                "nnodes": nnodes,
+                "ntasks": nnodes * rng.choice([1, cores_per_node]),
+                "ncores": nnodes * cores_per_node,
+                "burstable": rng.random() < burstable,
+            }
+            transitions = [
+                [t_submit, "NEW"],
+                [t_submit + 0.01, "DEPEND"],
+                [t_submit + 0.02, "PRIORITY"],
+                [t_submit + 0.03, "SCHED"],
+            ]
+
+            job["runtime"] = rng.lognormvariate(mu, sigma)
+
+            # Burstable jobs that are still pending wait for a burst
+            queued = transitions[-1][0]
+            if not is_pending:
+                t_run = rng.uniform(queued, 0) if queued < 0 else queued
+                transitions += get_run_transitions(t_run, job["runtime"])
+            elif not job["burstable"]:
+                t_run = max(queued, 0) + rng.expovariate(1 / mean_wait)
+                transitions += get_run_transitions(t_run, job["runtime"])
+            job["transitions"] = transitions
+            jobs.append(job)
+        return cls(jobs, burst_delay=burst_delay)
+
+    @classmethod
+    def load(cls, filename, **kwargs):
+        """
+        Load a workload saved to json.
+        """
+        return cls(utils.read_json(filename)["jobs"], **kwargs)
+
+    def save(self, filename):
+        """
+        Save the workload to json.
+        """
+        return utils.write_json({"jobs": list(self.jobs.values())}, filename)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def state(self, jobid, elapsed):
+        """
+        Get the state of a job at some seconds from the start.
+
+        A job that is not submitted yet has no state (None).
+        """
+        index = bisect.bisect_right(self.times[jobid], elapsed)
+        if not index:
+            return
+        return self.jobs[jobid]["transitions"][index - 1][1]
+
+    def listing(self, elapsed):
+        """
+        List jobs submitted by some seconds from the start, as flux job list would.
+        """
+        jobs = []
+        for jobid, job in self.jobs.items():
+            state = self.state(jobid, elapsed)
+            if state is None:
+                continue
+            jobs.append(self.get_listing(job, state))
+        return jobs
+
+    def get_listing(self, job, state):
+        listing = {
+            key: value
+            for key, value in job.items()
+            if key not in ["burstable", "transitions", "runtime"]
+        }
+        listing["state"] = defaults.job_states[state]
+        return listing
+
+    def info(self, jobid, elapsed):
+        """
+        Get job info (with the jobspec) for a job, as the job info RPC would.
+        """
+        job = self.jobs[jobid]
+        state = self.state(jobid, elapsed)
+        if state is None:
+            raise FileNotFoundError(f"Job {jobid} is not submitted yet")
+
+        info = self.get_listing(job, state)
+        system = {"duration": 0, "cwd": "/tmp"}
+        if job["burstable"]:
+            system["burstable"] = 1
+        slots = max(job["ntasks"] // job["nnodes"], 1)
+        info["spec"] = {
+            "resources": [
+                {
+                    "type": "node",
+                    "count": job["nnodes"],
+                    "exclusive": True,
+                    "with": [
+                        {
+                            "type": "slot",
+                            "count": slots,
+                            "with": [
+                                {
+                                    "type": "core",
+                                    "count": max(job["ncores"] // job["ntasks"], 1),
+                                }
+                            ],
+                            "label": "task",
+                        }
+                    ],
+                }
+            ],
+            "tasks": [
+                {"command": [job["name"]], "slot": "task", "count": {"per_slot": 1}}
+            ],
+            "attributes": {"system": system},
+            "version": 1,
+        }
+        return info
+
+    def schedule(self, jobid, elapsed):
+        """
+        A pending job was scheduled by a burst, so it runs after the burst delay.
+        """
+        job = self.jobs[jobid]
+        job["burstable"] = False
+        if self.state(jobid, float("inf")) != "SCHED":
+            return
+        transitions = get_run_transitions(elapsed + self.burst_delay, job["runtime"])
+        job["transitions"] += transitions
+        self.times[jobid] += [t for t, _ in transitions]
+        if self._events is not None:
+            for t, state in transitions:
+                self.add_event(t, jobid, state)
+
+    def events(self, elapsed):
+        """
+        Yield journal events up to some seconds from the start, in order.
+
+        Each event is only yielded once.
+        """
+        if self._events is None:
+            self._events = []
+            for jobid, job in self.jobs.items():
+                for t, state in job["transitions"]:
+                    self.add_event(t, jobid, state)
+        while self._events and self._events[0][0] <= elapsed:
+            t, _, jobid, state = heapq.heappop(self._events)
+            yield {
+                "id": jobid,
+                "name": state_events[state],
+                "timestamp": t,
+                "context": {},
+            }
+
+    def add_event(self, t, jobid, state):
+        heapq.heappush(self._events, (t, next(self._count), jobid, state))
+
+
+def get_run_transitions(t_run, runtime):
+    """
+    Get the transitions for a job that starts running at t_run.
+    """
+    return [
+        [t_run, "RUN"],
+        [t_run + runtime, "CLEANUP"],
+        [t_run + runtime + 1, "INACTIVE"],
+    ]
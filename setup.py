@@ -72,6 +72,7 @@ if __name__ == "__main__":
     TESTS_REQUIRES = get_reqs(lookup, "TESTS_REQUIRES")
     INSTALL_REQUIRES_ALL = get_reqs(lookup, "INSTALL_REQUIRES_ALL")
     INSTALL_REQUIRES_KUBERNETES = get_reqs(lookup, "INSTALL_REQUIRES_KUBERNETES")
+    INSTALL_REQUIRES_TRACING = get_reqs(lookup, "INSTALL_REQUIRES_TRACING")
     setup(
         name=NAME,
         version=VERSION,
@@ -93,6 +94,7 @@ if __name__ == "__main__":
         extras_require={
             "all": [INSTALL_REQUIRES_ALL],
             "kubernetes": [INSTALL_REQUIRES_KUBERNETES],
+            "tracing": [INSTALL_REQUIRES_TRACING],
         },
         classifiers=[
             "Intended Audience :: Science/Research",
@@ -104,5 +106,10 @@ if __name__ == "__main__":
             "Operating System :: Unix",
             "Programming Language :: Python :: 3.8",
         ],
-        entry_points={"console_scripts": ["flux-burst=fluxburst.client:run"]},
+        entry_points={
+            "console_scripts": [
+                "flux-burst=fluxburst.cli:run",
+                "fluxburst=fluxburst.cli:run",
+            ]
+        },
     )